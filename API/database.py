@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -23,6 +25,26 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for routers that await database I/O instead of blocking the event loop.
+# It points at the same database through the asyncpg (PostgreSQL) or aiosqlite driver
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+_database_url = make_url(DATABASE_URL)
+ASYNC_DATABASE_URL = _database_url.set(
+    drivername=_ASYNC_DRIVERS.get(_database_url.get_backend_name(), _database_url.drivername)
+)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    connect_args={
+        "timeout": 10,  # 接続タイムアウトを10秒に設定
+    }
+)
+
+# Objects stay usable after commit: async sessions cannot lazily reload expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -33,3 +55,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Function to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
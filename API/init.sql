@@ -24,21 +24,21 @@ CREATE TABLE IF NOT EXISTS chat_messages (
     role VARCHAR NOT NULL,
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
     conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE,
-    meta_data TEXT DEFAULT '{}',
+    meta_data JSONB DEFAULT '{}'::jsonb,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
 -- Create indexes for faster queries
-CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_id ON chat_messages(conversation_id);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_id_created_at ON chat_messages(conversation_id, created_at);
 CREATE INDEX IF NOT EXISTS idx_chat_messages_user_id ON chat_messages(user_id);
-CREATE INDEX IF NOT EXISTS idx_conversations_user_id ON conversations(user_id);
+CREATE INDEX IF NOT EXISTS idx_conversations_user_id_created_at ON conversations(user_id, created_at);
 
 -- Create the networks table
 CREATE TABLE IF NOT EXISTS networks (
     id SERIAL PRIMARY KEY,
     name VARCHAR DEFAULT 'Untitled Network',
     conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE UNIQUE,
-    graphml_content TEXT NOT NULL,
+    graphml_content TEXT COMPRESSION lz4 NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE
 );
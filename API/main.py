@@ -1,36 +1,224 @@
+import os
 import time
+import asyncio
+import itertools
 import logging
 from fastapi import FastAPI, APIRouter, HTTPException, Request, Depends, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
 import sqlalchemy.exc
-import json
+import orjson
 
 from database import engine, Base
+import models
 from routers import auth as auth_router
 from routers import chat as chat_router
 from routers import network as network_router
 import auth
+from services.mcp_client import close_mcp_client
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+# 複数ワーカー構成でブロードキャストを全ワーカーに届けるためのRedis（未設定時はプロセス内のみに配信）
+REDIS_URL = os.environ.get("REDIS_URL")
+# ブロードキャストを中継するRedis Pub/Subのチャネル名
+BROADCAST_CHANNEL = os.environ.get("BROADCAST_CHANNEL", "network_update")
+
+# クライアント1件への送信を待つ最大秒数
+BROADCAST_SEND_TIMEOUT = 5.0
+# クライアントごとの送信待ちメッセージ数の上限（超えたクライアントは切断する）
+CLIENT_QUEUE_SIZE = 256
+# 書き込みタスクが1フレームにまとめて送るメッセージ数の上限
+MAX_BATCH_SIZE = 32
+# 同時に接続できるWebSocketクライアント数の上限
+MAX_CONNECTIONS = 1000
+# 送信がない間、死活確認のpingを送る間隔（秒）
+HEARTBEAT_INTERVAL = 30.0
+
+def batch_frames(frames: List[Any]) -> Any:
+    """
+    エンコード済みの複数フレームを {"type": "batch", "msgs": [...]} の1フレームにまとめる
+    
+    各メッセージは再エンコードせず、エンコード済みのバイト列・文字列をそのまま連結する
+    """
+    if isinstance(frames[0], bytes):
+        packer = msgpack.Packer(use_bin_type=True)
+        return (
+            packer.pack_map_header(2)
+            + packer.pack("type") + packer.pack("batch")
+            + packer.pack("msgs") + packer.pack_array_header(len(frames))
+            + b"".join(frames)
+        )
+    return '{"type":"batch","msgs":[' + ",".join(frames) + "]}"
 
 # WebSocket接続マネージャー
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        # MessagePackのバイナリフレームで受信するクライアント（それ以外はJSONテキスト）
+        self.msgpack_clients: set = set()
+        # クライアントごとの送信キューと、キューを送信する書き込みタスク
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.writers: Dict[str, asyncio.Task] = {}
+        # 接続ごとに一意なクライアントIDを振るための連番
+        self._client_counter = itertools.count()
+        # Redis Pub/Subでブロードキャストを中継する場合のクライアントと購読タスク
+        self.redis = None
+        self.subscriber: Optional[asyncio.Task] = None
+        # 切断した接続のソケットを閉じるタスク（完了まで参照を保持する）
+        self._closers: set = set()
+    
+    def new_client_id(self, user_id: int) -> str:
+        # 時刻ベースのIDは短時間の再接続で衝突し、既存の接続を上書きしてしまうため連番を使う
+        return f"user_{user_id}_{next(self._client_counter)}"
     
-    async def connect(self, websocket: WebSocket, client_id: str):
+    async def connect(self, websocket: WebSocket, client_id: str, wire_format: str = "json") -> bool:
+        # 上限に達している場合は接続を拒否する
+        if len(self.active_connections) >= MAX_CONNECTIONS:
+            await websocket.close(code=1013, reason="Too many connections")
+            logging.warning(f"Rejected client {client_id}: connection limit reached")
+            return False
         await websocket.accept()
         self.active_connections[client_id] = websocket
+        if wire_format == "msgpack" and msgpack is not None:
+            self.msgpack_clients.add(client_id)
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.queues[client_id] = queue
+        self.writers[client_id] = asyncio.create_task(self._writer(client_id, websocket, queue))
         logging.info(f"Client {client_id} connected. Total: {len(self.active_connections)}")
+        return True
     
     def disconnect(self, client_id: str):
         if client_id in self.active_connections:
-            del self.active_connections[client_id]
+            websocket = self.active_connections.pop(client_id)
+            self.msgpack_clients.discard(client_id)
+            self.queues.pop(client_id, None)
+            writer = self.writers.pop(client_id, None)
+            if writer is not None and writer is not asyncio.current_task():
+                writer.cancel()
+                # 送信途中で止めた接続は使えないため、受信待ちのエンドポイントを終了させるようソケットを閉じる
+                # （クライアントから切断済みの場合は何もしない）
+                closer = asyncio.create_task(self._close_socket(websocket))
+                self._closers.add(closer)
+                closer.add_done_callback(self._closers.discard)
             logging.info(f"Client {client_id} disconnected. Total: {len(self.active_connections)}")
     
-    async def broadcast(self, message: Dict[str, Any]):
-        for connection in self.active_connections.values():
-            await connection.send_json(message)
+    async def _close_socket(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1011), timeout=BROADCAST_SEND_TIMEOUT)
+        except Exception:
+            pass
+    
+    async def _writer(self, client_id: str, websocket: WebSocket, queue: asyncio.Queue):
+        # キューに積まれたエンコード済みフレームを順に送信する
+        # 送信待ちが複数溜まっている場合は1フレームにまとめ、フレームごとのオーバーヘッドを減らす
+        # 一定時間送信がなければpingを送り、送信できない（切断済みの）接続を検出する
+        ping = msgpack.packb({"type": "ping"}) if client_id in self.msgpack_clients else '{"type":"ping"}'
+        try:
+            while True:
+                try:
+                    frames = [await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)]
+                except asyncio.TimeoutError:
+                    frames = [ping]
+                while len(frames) < MAX_BATCH_SIZE:
+                    try:
+                        frames.append(queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                frame = frames[0] if len(frames) == 1 else batch_frames(frames)
+                if isinstance(frame, bytes):
+                    send_frame = websocket.send_bytes(frame)
+                else:
+                    send_frame = websocket.send_text(frame)
+                await asyncio.wait_for(send_frame, timeout=BROADCAST_SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"Failed to send to client {client_id}: {e}")
+            self.disconnect(client_id)
+            # 受信待ちのエンドポイントを終了させるためソケットを閉じる
+            await self._close_socket(websocket)
+    
+    async def start_pubsub(self, redis_url: str):
+        # Redisのチャネルを購読し、全ワーカーのブロードキャストを自ワーカーのクライアントに配信する
+        self.redis = aioredis.from_url(redis_url)
+        self.subscriber = asyncio.create_task(self._subscribe())
+    
+    async def stop_pubsub(self):
+        if self.subscriber is not None:
+            self.subscriber.cancel()
+            self.subscriber = None
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+    
+    async def _subscribe(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(BROADCAST_CHANNEL)
+                async for item in pubsub.listen():
+                    if item["type"] == "message":
+                        # 「宛先ユーザーID（全員宛ては空）\nJSON」の形式で受け取る
+                        target, _, payload = item["data"].decode().partition("\n")
+                        self._fanout(payload, user_id=int(target) if target else None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Redisとの接続が切れた場合は少し待って購読し直す
+                logging.warning(f"Broadcast subscription failed: {e}")
+                await asyncio.sleep(1.0)
+    
+    async def broadcast(self, message: Dict[str, Any], user_id: Optional[int] = None):
+        # user_idを指定した場合はそのユーザーの接続にだけ配信する
+        # JSONは送信するテキストフレームと同じ形式で一度だけエンコードする
+        # （send_jsonと同じ区切り文字なし・非ASCIIをエスケープしない形式。フロントエンドはevent.dataをJSON.parseする）
+        payload = orjson.dumps(message).decode()
+        if self.redis is not None:
+            # 配信は購読タスクが行う（自ワーカーのクライアントにもRedis経由で届く）
+            # エンコード済みのJSONは改行を含まないため、宛先を改行区切りで前に付ける
+            target = "" if user_id is None else str(user_id)
+            try:
+                await self.redis.publish(BROADCAST_CHANNEL, f"{target}\n{payload}")
+            except Exception as e:
+                # 通知の失敗で呼び出し元の処理を失敗させない
+                logging.warning(f"Failed to publish broadcast: {e}")
+        else:
+            self._fanout(payload, message, user_id)
+    
+    def _fanout(self, payload: str, message: Optional[Dict[str, Any]] = None, user_id: Optional[int] = None):
+        # 各クライアントのキューに積むだけで、送信の完了は待たない
+        # （遅いクライアントが呼び出し元や他のクライアントを待たせないようにする）
+        # メッセージのエンコードはクライアントごとではなく形式ごとに一度だけ行う
+        packed = None
+        if self.msgpack_clients:
+            if message is None:
+                message = orjson.loads(payload)
+            packed = msgpack.packb(message, use_bin_type=True)
+        
+        # クライアントIDは new_client_id で「user_{ユーザーID}_{連番}」の形式にしている
+        prefix = "" if user_id is None else f"user_{user_id}_"
+        overflowed = []
+        for client_id, queue in self.queues.items():
+            if not client_id.startswith(prefix):
+                continue
+            try:
+                queue.put_nowait(packed if client_id in self.msgpack_clients else payload)
+            except asyncio.QueueFull:
+                overflowed.append(client_id)
+        # 送信が追いつかないクライアントは切断済みとみなして取り除く
+        for client_id in overflowed:
+            logging.warning(f"Send queue full for client {client_id}")
+            self.disconnect(client_id)
 
 # データベースの接続を待機
 max_retries = 15
@@ -54,6 +242,27 @@ for i in range(max_retries):
 # データベーステーブルの作成
 try:
     Base.metadata.create_all(bind=engine)
+    # create_allは既存のテーブルにインデックスを追加しないため、クエリ用のインデックスは個別に作成する
+    for index in models.QUERY_INDEXES:
+        index.create(bind=engine, checkfirst=True)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            # 既存のTEXT型のmeta_data（JSON文字列）をJSONBに変換する
+            meta_data_type = conn.execute(sqlalchemy.text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_name = 'chat_messages' AND column_name = 'meta_data'"
+            )).scalar()
+            if meta_data_type == "text":
+                conn.execute(sqlalchemy.text(
+                    "ALTER TABLE chat_messages "
+                    "ALTER COLUMN meta_data DROP DEFAULT, "
+                    "ALTER COLUMN meta_data TYPE JSONB USING COALESCE(NULLIF(meta_data, ''), '{}')::jsonb, "
+                    "ALTER COLUMN meta_data SET DEFAULT '{}'::jsonb"
+                ))
+            # GraphMLはlz4で圧縮して保存する（以降に書き込まれる値に適用される）
+            conn.execute(sqlalchemy.text(
+                "ALTER TABLE networks ALTER COLUMN graphml_content SET COMPRESSION lz4"
+            ))
     print("Database tables created successfully")
 except Exception as e:
     print(f"Error creating database tables: {e}")
@@ -81,6 +290,26 @@ app.include_router(network_router.router)
 # WebSocket接続マネージャーをapp.stateに格納
 app.state.ws_manager = ConnectionManager()
 
+@app.on_event("startup")
+async def start_broadcast_pubsub():
+    # REDIS_URLが設定されていればブロードキャストをRedis経由で全ワーカーに中継する
+    if REDIS_URL and aioredis is not None:
+        await app.state.ws_manager.start_pubsub(REDIS_URL)
+
+@app.on_event("shutdown")
+async def shutdown_mcp_client():
+    # NetworkXMCPへのプール済み接続を閉じる
+    await close_mcp_client()
+
+@app.on_event("shutdown")
+async def stop_broadcast_pubsub():
+    await app.state.ws_manager.stop_pubsub()
+
+@app.on_event("shutdown")
+async def stop_chat_responders():
+    # チャット応答のワーカータスクを停止する
+    await chat_router.stop_responders()
+
 @app.get("/")
 async def root():
     return {"message": "Network Visualization API is running"}
@@ -112,8 +341,11 @@ async def websocket_endpoint(websocket: WebSocket):
             await websocket.close(code=1008, reason="Invalid token")
             return
         
-        client_id = f"user_{user.id}_{time.time()}"
-        await ws_manager.connect(websocket, client_id)
+        client_id = ws_manager.new_client_id(user.id)
+        # ?format=msgpack を指定したクライアントにはMessagePackで送信する
+        # （msgpack未インストール時はJSONテキストで送信する）
+        if not await ws_manager.connect(websocket, client_id, websocket.query_params.get("format", "json")):
+            return
         
         try:
             # 接続を維持し、クライアントからの切断を待つ
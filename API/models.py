@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -39,7 +40,7 @@ class ChatMessage(Base):
     role = Column(String)  # "user" or "assistant"
     user_id = Column(Integer, ForeignKey("users.id"))
     conversation_id = Column(Integer, ForeignKey("conversations.id"))
-    meta_data = Column(Text, default="{}")  # JSON string for additional metadata
+    meta_data = Column(JSON().with_variant(JSONB, "postgresql"), default=dict)  # Additional metadata (JSONB on PostgreSQL)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -58,3 +59,10 @@ class Network(Base):
     
     # Relationships
     conversation = relationship("Conversation", back_populates="network")
+
+# Composite indexes for listing a user's conversations and a conversation's messages
+# in created_at order (same definitions as init.sql)
+QUERY_INDEXES = (
+    Index("idx_conversations_user_id_created_at", Conversation.user_id, Conversation.created_at),
+    Index("idx_chat_messages_conversation_id_created_at", ChatMessage.conversation_id, ChatMessage.created_at),
+)
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
@@ -43,8 +44,8 @@ async def login_for_access_token(
     db: Session = Depends(get_db)
 ):
     """Generate a JWT token for authentication."""
-    # Authenticate user
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    # Authenticate user (the bcrypt check is CPU-bound, so keep it off the event loop)
+    user = await asyncio.to_thread(auth.authenticate_user, db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
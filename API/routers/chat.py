@@ -3,12 +3,19 @@ Chat router for the API.
 Handles conversations, messages, and orchestrates interactions with the LLM and NetworkXMCP.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
-import json
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
+from pydantic import TypeAdapter, ValidationError
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+import orjson
+import asyncio
 import datetime
-import httpx
+import logging
 import os
 import networkx as nx
 import io
@@ -16,8 +23,11 @@ import io
 import models
 import schemas
 import auth
-from database import get_db
-from services.llm import process_chat_message
+from database import AsyncSessionLocal, get_async_db
+from services.llm import process_chat_message, stream_chat_message
+from services.mcp_client import NETWORKX_MCP_URL, post_mcp_tool
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/chat",
@@ -25,12 +35,105 @@ router = APIRouter(
     responses={401: {"description": "Unauthorized"}},
 )
 
-# NetworkXMCPサーバーとの通信はproxy.pyを介して行う
-# APIサーバー内部では直接NetworkXMCPサーバーにアクセス
-NETWORKX_MCP_URL = os.environ.get("NETWORKX_MCP_URL", "http://networkx-mcp:8001")
-
+# Parses and validates the /process request body (a JSON object) in one pass in pydantic-core
+_PROCESS_BODY_ADAPTER = TypeAdapter(Dict[str, Any])
+
+# Formatted LLM history per conversation ({"role", "content"} dicts in created_at order),
+# keyed by conversation id with the message count and highest message id it reflects.
+# Every message this router commits is appended here as well. The cache is per process, so
+# before it is used the count and max id are checked against the database (one indexed
+# aggregate); messages written by another worker or process make it reload the history
+HISTORY_CACHE_SIZE = 1024
+_history_cache: "OrderedDict[int, Tuple[int, Optional[int], List[Dict[str, str]]]]" = OrderedDict()
+
+# Messages posted to /conversations/{id}/messages are answered by a fixed pool of worker
+# tasks reading from a queue, so responses for different conversations run concurrently
+# (bounded by the pool size) without tying them to the request that created them
+RESPONDER_WORKERS = int(os.environ.get("CHAT_RESPONDER_WORKERS", "8"))
+_response_queue: Optional[asyncio.Queue] = None
+_responder_tasks: List[asyncio.Task] = []
+
+def select_conversations(with_graphml: bool = True):
+    """
+    SELECT for conversations with their network joined into the same query.
+    Async sessions cannot lazy-load, so any other relationship access raises immediately.
+    With with_graphml=False the (potentially large) GraphML column is left unloaded;
+    use load_graphml() when it is actually needed.
+    """
+    network = joinedload(models.Conversation.network)
+    if not with_graphml:
+        network = network.defer(models.Network.graphml_content)
+    return select(models.Conversation).options(network, raiseload("*"))
+
+async def get_user_conversation(
+    db: AsyncSession, conversation_id: int, user_id: int, with_graphml: bool = True
+) -> Optional[models.Conversation]:
+    """Get a conversation owned by the given user, or None."""
+    result = await db.execute(select_conversations(with_graphml).where(
+        models.Conversation.id == conversation_id,
+        models.Conversation.user_id == user_id
+    ))
+    return result.scalar_one_or_none()
+
+async def load_graphml(db: AsyncSession, db_conversation: models.Conversation) -> str:
+    """Get the GraphML content of a conversation's network, loading the deferred column if needed."""
+    network = db_conversation.network
+    if network is None:
+        return create_empty_graphml()
+    if "graphml_content" in inspect(network).unloaded:
+        await db.refresh(network, ["graphml_content"])
+    return network.graphml_content
+
+async def load_history(db: AsyncSession, conversation_id: int) -> List[Dict[str, str]]:
+    """Get a conversation's formatted history, reloading it from the database when the cached copy is stale."""
+    count, max_id = (await db.execute(
+        select(func.count(models.ChatMessage.id), func.max(models.ChatMessage.id))
+        .where(models.ChatMessage.conversation_id == conversation_id)
+    )).one()
+    cached = _history_cache.get(conversation_id)
+    if cached is not None and cached[:2] == (count, max_id):
+        history = cached[2]
+        _history_cache.move_to_end(conversation_id)
+    else:
+        # Only role and content are needed; skip loading full rows with their meta_data blobs
+        rows = (await db.execute(
+            select(models.ChatMessage.role, models.ChatMessage.content)
+            .where(models.ChatMessage.conversation_id == conversation_id)
+            .order_by(models.ChatMessage.created_at, models.ChatMessage.id)
+        )).all()
+        history = [{"role": role, "content": content} for role, content in rows]
+        _history_cache[conversation_id] = (len(history), max_id, history)
+        _history_cache.move_to_end(conversation_id)
+        if len(_history_cache) > HISTORY_CACHE_SIZE:
+            _history_cache.popitem(last=False)
+    # Callers extend the list for follow-up LLM calls, so hand out a copy
+    return list(history)
+
+def append_history(conversation_id: int, message: models.ChatMessage) -> None:
+    """Record a committed message in the cached history, if the conversation is cached."""
+    cached = _history_cache.get(conversation_id)
+    if cached is not None:
+        count, max_id, history = cached
+        history.append({"role": message.role, "content": message.content})
+        _history_cache[conversation_id] = (count + 1, max(max_id or 0, message.id), history)
+
+async def call_mcp_tools(tool_calls: List[Dict[str, Any]], graphml_content: str) -> List[Any]:
+    """
+    Run the LLM's tool calls against NetworkXMCP concurrently.
+    Returns the responses in the same order as tool_calls.
+    """
+    async def call(tool_call: Dict[str, Any]):
+        tool_name = tool_call["function"]["name"]
+        tool_args = tool_call["function"]["arguments"] # Already a dict
+        url = f"{NETWORKX_MCP_URL}/tools/{tool_name}"
+        # Arguments can be large, so they are only logged at debug level
+        logger.debug(f"Calling NetworkXMCP: {url} with args {tool_args}")
+        return await post_mcp_tool(url, {"graphml_content": graphml_content, **tool_args})
+    return await asyncio.gather(*(call(tool_call) for tool_call in tool_calls))
+
+@lru_cache(maxsize=1)
 def create_empty_graphml() -> str:
-    """Creates an empty GraphML string."""
+    """Creates an empty GraphML string (built once; the result is an immutable constant)."""
     G = nx.Graph()
     output = io.BytesIO()
     nx.write_graphml(G, output)
@@ -40,54 +143,52 @@ def create_empty_graphml() -> str:
 async def create_conversation(
     conversation: schemas.ConversationCreate,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new conversation and an associated empty network.
     """
+    # Create the conversation together with its empty network in a single commit
     db_conversation = models.Conversation(
         title=conversation.title,
-        user_id=current_user.id
+        user_id=current_user.id,
+        network=models.Network(
+            name="Initial Network",
+            graphml_content=create_empty_graphml()
+        )
     )
     db.add(db_conversation)
-    db.commit()
-    db.refresh(db_conversation)
-
-    # Create an associated empty network
-    db_network = models.Network(
-        name="Initial Network",
-        conversation_id=db_conversation.id,
-        graphml_content=create_empty_graphml()
-    )
-    db.add(db_network)
-    db.commit()
-    db.refresh(db_conversation) # Refresh to load the network relationship
+    await db.commit()
 
-    return db_conversation
+    # Reload with the server-generated timestamps of the conversation and its network
+    result = await db.execute(
+        select_conversations()
+        .where(models.Conversation.id == db_conversation.id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
 
 @router.get("/conversations", response_model=List[schemas.Conversation])
 async def get_conversations(
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all conversations for the current user.
     """
-    return db.query(models.Conversation).filter(models.Conversation.user_id == current_user.id).all()
+    result = await db.execute(select_conversations().where(models.Conversation.user_id == current_user.id))
+    return result.scalars().all()
 
 @router.get("/conversations/{conversation_id}", response_model=schemas.Conversation)
 async def get_conversation(
     conversation_id: int,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific conversation by ID.
     """
-    db_conversation = db.query(models.Conversation).filter(
-        models.Conversation.id == conversation_id,
-        models.Conversation.user_id == current_user.id
-    ).first()
+    db_conversation = await get_user_conversation(db, conversation_id, current_user.id)
     
     if db_conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -98,39 +199,35 @@ async def get_conversation(
 async def get_messages(
     conversation_id: int,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all messages for a conversation.
     """
     # Check if conversation exists and belongs to user
-    db_conversation = db.query(models.Conversation).filter(
-        models.Conversation.id == conversation_id,
-        models.Conversation.user_id == current_user.id
-    ).first()
+    db_conversation = await get_user_conversation(db, conversation_id, current_user.id, with_graphml=False)
     
     if db_conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    return db.query(models.ChatMessage).filter(
-        models.ChatMessage.conversation_id == conversation_id
-    ).order_by(models.ChatMessage.created_at).all()
+    result = await db.execute(
+        select(models.ChatMessage)
+        .where(models.ChatMessage.conversation_id == conversation_id)
+        .order_by(models.ChatMessage.created_at, models.ChatMessage.id)
+    )
+    return result.scalars().all()
 
 @router.post("/conversations/{conversation_id}/messages", response_model=schemas.ChatMessage)
 async def create_message(
     conversation_id: int,
     message: schemas.ChatMessageCreate,
-    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new message, process it with the LLM, and potentially trigger network operations.
     """
-    db_conversation = db.query(models.Conversation).filter(
-        models.Conversation.id == conversation_id,
-        models.Conversation.user_id == current_user.id
-    ).first()
+    db_conversation = await get_user_conversation(db, conversation_id, current_user.id, with_graphml=False)
     
     if db_conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -138,7 +235,7 @@ async def create_message(
     # メッセージが辞書型の場合は文字列に変換
     message_content = message.content
     if isinstance(message_content, dict):
-        message_content = json.dumps(message_content)
+        message_content = orjson.dumps(message_content).decode()
         
     # Save user message
     db_message = models.ChatMessage(
@@ -148,69 +245,91 @@ async def create_message(
         conversation_id=conversation_id
     )
     db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
+    await db.commit()
+    await db.refresh(db_message)
+    append_history(conversation_id, db_message)
     
-    # Process message in the background
-    background_tasks.add_task(
-        process_and_respond,
-        db=db,
-        conversation_id=conversation_id,
-        user_message_content=message.content
-    )
+    # Hand the message to the responder workers and return immediately
+    enqueue_response(conversation_id, message.content)
     
     return db_message
 
-async def process_and_respond(db: Session, conversation_id: int, user_message_content):
+def enqueue_response(conversation_id: int, user_message_content) -> None:
+    """Queue a user message for the responder workers, starting them on first use."""
+    global _response_queue
+    if _response_queue is None:
+        _response_queue = asyncio.Queue()
+        _responder_tasks.extend(asyncio.create_task(_responder()) for _ in range(RESPONDER_WORKERS))
+    _response_queue.put_nowait((conversation_id, user_message_content))
+
+async def stop_responders() -> None:
+    """Cancel the responder workers (called on application shutdown)."""
+    global _response_queue
+    for task in _responder_tasks:
+        task.cancel()
+    await asyncio.gather(*_responder_tasks, return_exceptions=True)
+    _responder_tasks.clear()
+    _response_queue = None
+
+async def _responder():
+    """Worker loop: answer queued messages one at a time."""
+    queue = _response_queue
+    while True:
+        conversation_id, user_message_content = await queue.get()
+        try:
+            await process_and_respond(conversation_id, user_message_content)
+        except Exception as e:
+            print(f"Error in responder for conversation {conversation_id}: {str(e)}")
+        finally:
+            queue.task_done()
+
+async def process_and_respond(conversation_id: int, user_message_content):
     """
     Process user message, interact with LLM and NetworkXMCP, and save the response.
     This version handles the full conversation loop including tool calls and feedback.
+    Runs in a responder worker, independently of the request that posted the message.
+    Database sessions are only held for the reads before and the write after the LLM and
+    tool calls, so a slow turn does not keep a pooled connection checked out.
     """
     # メッセージが辞書型の場合は文字列に変換
     if isinstance(user_message_content, dict):
-        user_message_content = json.dumps(user_message_content)
+        user_message_content = orjson.dumps(user_message_content).decode()
     # メッセージが文字列でない場合も文字列に変換する
     elif not isinstance(user_message_content, str):
         user_message_content = str(user_message_content)
-        
-    db_conversation = db.query(models.Conversation).get(conversation_id)
-    if not db_conversation:
-        print(f"Error: Conversation with ID {conversation_id} not found.")
-        return
 
-    try:
+    # GraphML is only loaded if the LLM calls a tool
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select_conversations(with_graphml=False).where(models.Conversation.id == conversation_id))
+        db_conversation = result.scalar_one_or_none()
+        if not db_conversation:
+            print(f"Error: Conversation with ID {conversation_id} not found.")
+            return
+        user_id = db_conversation.user_id
         # 1. Get conversation history
-        history = db.query(models.ChatMessage).filter(
-            models.ChatMessage.conversation_id == conversation_id
-        ).order_by(models.ChatMessage.created_at).all()
-        formatted_history = [{"role": msg.role, "content": msg.content} for msg in history]
+        formatted_history = await load_history(db, conversation_id)
 
+    try:
         # 2. Call LLM to get the next step (either a tool call or a direct response)
         llm_response = await process_chat_message(formatted_history)
+        # Serialized once: reused as the assistant turn in the history and as the message metadata
+        llm_response_json = orjson.dumps(llm_response).decode()
 
         tool_calls = llm_response.get("tool_calls")
 
         if tool_calls:
-            # 3. Execute the tool call
-            tool_call = tool_calls[0] # Assuming one tool call for now
-            tool_name = tool_call["function"]["name"]
-            tool_args = tool_call["function"]["arguments"] # Already a dict
-
-            # Prepare payload for NetworkXMCP
-            mcp_payload = {
-                "graphml_content": db_conversation.network.graphml_content if db_conversation.network else create_empty_graphml(),
-                **tool_args
-            }
-
-            # Call NetworkXMCP
-            tool_result_content = ""
-            async with httpx.AsyncClient() as client:
-                url = f"{NETWORKX_MCP_URL}/tools/{tool_name}"
-                print(f"Calling NetworkXMCP: {url} with args {tool_args}")
-                response = await client.post(url, json=mcp_payload, timeout=60.0)
-                
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select_conversations().where(models.Conversation.id == conversation_id))
+                graphml_content = await load_graphml(db, result.scalar_one())
+
+            # 3. Execute the tool calls (concurrently when the LLM asked for several)
+            responses = await call_mcp_tools(tool_calls, graphml_content)
+
+            # Append the original llm_response (with the tool calls) and one result per call to the history
+            formatted_history.append({"role": "assistant", "content": llm_response_json})
+            for response in responses:
                 if response.status_code == 200:
-                    mcp_result = response.json().get("result", {})
+                    mcp_result = orjson.loads(response.content).get("result", {})
                     if mcp_result.get("success"):
                         # Update network or handle data
                         # This part needs to be robust
@@ -223,16 +342,14 @@ async def process_and_respond(db: Session, conversation_id: int, user_message_co
                             pass
                         
                         # Create a summary of the successful tool result for the LLM
-                        tool_result_content = json.dumps({"status": "success", "details": mcp_result})
+                        tool_result_content = orjson.dumps({"status": "success", "details": mcp_result}).decode()
                     else:
-                        tool_result_content = json.dumps({"status": "error", "details": mcp_result.get("error", "Unknown error from tool.")})
+                        tool_result_content = orjson.dumps({"status": "error", "details": mcp_result.get("error", "Unknown error from tool.")}).decode()
                 else:
-                    tool_result_content = json.dumps({"status": "error", "details": f"Tool execution failed with status {response.status_code}: {response.text}"})
+                    tool_result_content = orjson.dumps({"status": "error", "details": f"Tool execution failed with status {response.status_code}: {response.text}"}).decode()
+                formatted_history.append({"role": "tool", "content": tool_result_content})
 
-            # 4. Send the tool result back to the LLM to get a natural language response
-            # Append the original llm_response (with the tool call) and the tool result to the history
-            formatted_history.append({"role": "assistant", "content": json.dumps(llm_response)})
-            formatted_history.append({"role": "tool", "content": tool_result_content})
+            # 4. Send the tool results back to the LLM to get a natural language response
             
             final_llm_response = await process_chat_message(formatted_history)
             assistant_content = final_llm_response.get("content", "I've completed the operation.")
@@ -245,12 +362,14 @@ async def process_and_respond(db: Session, conversation_id: int, user_message_co
         db_response = models.ChatMessage(
             content=assistant_content,
             role="assistant",
-            user_id=db_conversation.user_id,
+            user_id=user_id,
             conversation_id=conversation_id,
-            meta_data=json.dumps(llm_response) # Store the initial LLM response for debugging
+            meta_data=llm_response # Store the initial LLM response for debugging
         )
-        db.add(db_response)
-        db.commit()
+        async with AsyncSessionLocal() as db:
+            db.add(db_response)
+            await db.commit()
+        append_history(conversation_id, db_response)
 
     except Exception as e:
         print(f"Error in process_and_respond: {str(e)}")
@@ -259,82 +378,109 @@ async def process_and_respond(db: Session, conversation_id: int, user_message_co
         db_error = models.ChatMessage(
             content=error_content,
             role="assistant",
-            user_id=db_conversation.user_id,
+            user_id=user_id,
             conversation_id=conversation_id,
-            meta_data=json.dumps({"error": True})
+            meta_data={"error": True}
         )
-        db.add(db_error)
-        db.commit()
+        async with AsyncSessionLocal() as db:
+            db.add(db_error)
+            await db.commit()
+        append_history(conversation_id, db_error)
+
+async def read_process_body(request: Request):
+    """Parse a /process request body; returns (message content as a string, conversation_id or None)."""
+    try:
+        body = _PROCESS_BODY_ADAPTER.validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid request body: {e.errors(include_url=False)}")
+    message_content = body.get("message", "")
+    conversation_id = body.get("conversation_id") # Allow specifying conversation
+
+    # メッセージが辞書型の場合は文字列に変換
+    if isinstance(message_content, dict):
+        message_content = orjson.dumps(message_content).decode()
+    # メッセージが文字列でない場合も文字列に変換する
+    elif not isinstance(message_content, str):
+        message_content = str(message_content)
+    
+    if not message_content:
+        raise HTTPException(status_code=400, detail="Message is required")
+    return message_content, conversation_id
+
+async def find_or_create_conversation(
+    db: AsyncSession, user_id: int, conversation_id: Optional[int]
+) -> models.Conversation:
+    """
+    Get the requested conversation (404 if it is not the user's), or the user's latest one.
+    If the user has none, returns a new, not yet added conversation with an empty network;
+    it is saved together with the messages at the end of the turn.
+    """
+    if conversation_id:
+        db_conversation = await get_user_conversation(db, conversation_id, user_id, with_graphml=False)
+        if not db_conversation:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        return db_conversation
+
+    result = await db.execute(
+        select_conversations(with_graphml=False)
+        .where(models.Conversation.user_id == user_id)
+        .order_by(models.Conversation.created_at.desc())
+        .limit(1)
+    )
+    db_conversation = result.scalar_one_or_none()
+    if not db_conversation:
+        db_conversation = models.Conversation(
+            title="New Conversation",
+            user_id=user_id,
+            network=models.Network(
+                name="Initial Network",
+                graphml_content=create_empty_graphml()
+            )
+        )
+    return db_conversation
+
+def summarize_tool_results(tool_calls: List[Dict[str, Any]], responses: List[Any]):
+    """
+    Build the history messages for the summarization call after running tools.
+    Returns (assistant tool-call message + one "tool" message per call, network update for the frontend).
+    """
+    messages = [{"role": "assistant", "content": orjson.dumps({"tool_calls": tool_calls}).decode()}]
+    network_update_info = None
+    for tool_call, response in zip(tool_calls, responses):
+        if response.status_code == 200:
+            mcp_result = orjson.loads(response.content).get("result", {})
+            tool_result_for_llm = {"status": "success", "details": mcp_result}
+            # The frontend applies a single update; report the first successful tool
+            if mcp_result.get("success") and network_update_info is None:
+                network_update_info = {"type": tool_call["function"]["name"], **mcp_result}
+                # Potentially update graphml in DB here if needed
+        else:
+            error_detail = response.text
+            tool_result_for_llm = {"status": "error", "details": f"Tool execution failed with status {response.status_code}: {error_detail}"}
+        messages.append({"role": "tool", "content": orjson.dumps(tool_result_for_llm).decode()})
+    return messages, network_update_info
 
 @router.post("/process")
 async def process_chat(
     request: Request,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Process a chat message from the frontend, handling the full conversation loop.
     This endpoint is the primary interaction point for the chat UI.
     """
     try:
-        body = await request.json()
-        message_content = body.get("message", "")
-        conversation_id = body.get("conversation_id") # Allow specifying conversation
-
-        # メッセージが辞書型の場合は文字列に変換
-        if isinstance(message_content, dict):
-            message_content = json.dumps(message_content)
-        # メッセージが文字列でない場合も文字列に変換する
-        elif not isinstance(message_content, str):
-            message_content = str(message_content)
-        
-        if not message_content:
-            raise HTTPException(status_code=400, detail="Message is required")
-
-        # Find or create a conversation
-        if conversation_id:
-            db_conversation = db.query(models.Conversation).filter(
-                models.Conversation.id == conversation_id,
-                models.Conversation.user_id == current_user.id
-            ).first()
-            if not db_conversation:
-                raise HTTPException(status_code=404, detail="Conversation not found")
-        else:
-            db_conversation = db.query(models.Conversation).filter(
-                models.Conversation.user_id == current_user.id
-            ).order_by(models.Conversation.created_at.desc()).first()
-            if not db_conversation:
-                db_conversation = models.Conversation(title="New Conversation", user_id=current_user.id)
-                db.add(db_conversation)
-                db.commit()
-                db.refresh(db_conversation)
-                # Create an associated empty network
-                db_network = models.Network(
-                    name="Initial Network",
-                    conversation_id=db_conversation.id,
-                    graphml_content=create_empty_graphml()
-                )
-                db.add(db_network)
-                db.commit()
-                db.refresh(db_conversation)
-
-        # Save user message
-        db_message = models.ChatMessage(
-            content=message_content,
-            role="user",
-            user_id=current_user.id,
-            conversation_id=db_conversation.id
-        )
-        db.add(db_message)
-        db.commit()
+        message_content, conversation_id = await read_process_body(request)
+        db_conversation = await find_or_create_conversation(db, current_user.id, conversation_id)
 
         # --- Start Conversation Loop ---
         
-        # 1. Get history
-        history = db.query(models.ChatMessage).filter(
-            models.ChatMessage.conversation_id == db_conversation.id
-        ).order_by(models.ChatMessage.created_at).all()
-        formatted_history = [{"role": msg.role, "content": msg.content} for msg in history]
+        # 1. Get history (a new conversation has none yet)
+        formatted_history = await load_history(db, db_conversation.id) if db_conversation.id else []
+        formatted_history.append({"role": "user", "content": message_content})
+        # End the read transaction so no pooled connection is held while waiting on the LLM
+        await db.commit()
 
         # 2. Call LLM
         llm_response = await process_chat_message(formatted_history)
@@ -344,38 +490,14 @@ async def process_chat(
         network_update_info = None
 
         if tool_calls:
-            # 3. Execute Tool
-            tool_call = tool_calls[0]
-            tool_name = tool_call["function"]["name"]
-            tool_args = tool_call["function"]["arguments"]
-
-            mcp_payload = {
-                "graphml_content": db_conversation.network.graphml_content if db_conversation.network else create_empty_graphml(),
-                **tool_args
-            }
-
-            tool_result_for_llm = {}
-            async with httpx.AsyncClient() as client:
-                url = f"{NETWORKX_MCP_URL}/tools/{tool_name}"
-                print(f"Calling MCP Tool: {url} with args: {tool_args}")
-                response = await client.post(url, json=mcp_payload, timeout=60.0)
+            # 3. Execute Tools (concurrently when the LLM asked for several)
+            responses = await call_mcp_tools(tool_calls, await load_graphml(db, db_conversation))
 
-                if response.status_code == 200:
-                    mcp_result = response.json().get("result", {})
-                    tool_result_for_llm = {"status": "success", "details": mcp_result}
-                    if mcp_result.get("success"):
-                        network_update_info = {"type": tool_name, **mcp_result}
-                        # Potentially update graphml in DB here if needed
-                else:
-                    error_detail = response.text
-                    tool_result_for_llm = {"status": "error", "details": f"Tool execution failed with status {response.status_code}: {error_detail}"}
-            
-            # 4. Send tool result back to LLM
             # We need to reconstruct the history for the final summarization call
-            final_history = formatted_history + [
-                {"role": "assistant", "content": json.dumps({"tool_calls": tool_calls})},
-                {"role": "tool", "content": json.dumps(tool_result_for_llm)}
-            ]
+            tool_messages, network_update_info = summarize_tool_results(tool_calls, responses)
+            final_history = formatted_history + tool_messages
+            
+            # 4. Send tool results back to LLM
             
             final_response_from_llm = await process_chat_message(final_history)
             final_assistant_content = final_response_from_llm.get("content", "I have completed the requested action.")
@@ -384,16 +506,26 @@ async def process_chat(
             # No tool call, just a direct response
             final_assistant_content = llm_response.get("content", "I'm not sure how to respond.")
 
-        # 5. Save final assistant response
+        # 5. Save the user message and the final assistant response
+        db_message = models.ChatMessage(
+            content=message_content,
+            role="user",
+            user_id=current_user.id,
+            conversation=db_conversation
+        )
         db_response = models.ChatMessage(
             content=final_assistant_content,
             role="assistant",
             user_id=current_user.id,
-            conversation_id=db_conversation.id,
-            meta_data=json.dumps(llm_response) # Store initial response for debug
+            conversation=db_conversation,
+            meta_data=llm_response # Store initial response for debug
         )
-        db.add(db_response)
-        db.commit()
+        # One commit for the whole turn (the user message is inserted first, so it keeps
+        # the lower id when both rows get the same transaction timestamp)
+        db.add_all([db_message, db_response])
+        await db.commit()
+        append_history(db_conversation.id, db_message)
+        append_history(db_conversation.id, db_response)
 
         # 6. Return result to frontend
         return {
@@ -408,3 +540,81 @@ async def process_chat(
         import traceback
         traceback.print_exc()
         return {"success": False, "content": f"An unexpected error occurred: {str(e)}"}
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> bytes:
+    """Encode one Server-Sent Event."""
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + orjson.dumps(data) + b"\n\n"
+
+@router.post("/process/stream")
+async def process_chat_stream(
+    request: Request,
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Streaming variant of /process: the same conversation loop, answered as Server-Sent Events.
+    Events: "data: {"content": chunk}" as the answer is generated, "event: network_update" after
+    tools ran, and a final "event: done" ({"conversation_id": ...}) or "event: error".
+    The messages are saved in one commit once the answer is complete.
+    """
+    message_content, conversation_id = await read_process_body(request)
+    db_conversation = await find_or_create_conversation(db, current_user.id, conversation_id)
+    formatted_history = await load_history(db, db_conversation.id) if db_conversation.id else []
+    formatted_history.append({"role": "user", "content": message_content})
+    await db.commit()
+    # The request's session may be closed while the response streams, so the turn uses its own
+    conversation_id = db_conversation.id
+    new_conversation = None if conversation_id else db_conversation
+    user_id = current_user.id
+
+    async def stream_turn():
+        async with AsyncSessionLocal() as stream_db:
+            try:
+                if new_conversation is None:
+                    result = await stream_db.execute(
+                        select_conversations(with_graphml=False).where(models.Conversation.id == conversation_id)
+                    )
+                    turn_conversation = result.scalar_one()
+                else:
+                    turn_conversation = new_conversation
+
+                content_chunks = []
+                tool_calls = None
+                async for event in stream_chat_message(formatted_history):
+                    if "tool_calls" in event:
+                        tool_calls = event["tool_calls"]
+                    else:
+                        content_chunks.append(event["content"])
+                        yield sse_event(event)
+                llm_response = {"tool_calls": tool_calls} if tool_calls else {"content": "".join(content_chunks)}
+
+                if tool_calls:
+                    responses = await call_mcp_tools(tool_calls, await load_graphml(stream_db, turn_conversation))
+                    tool_messages, network_update_info = summarize_tool_results(tool_calls, responses)
+                    if network_update_info is not None:
+                        yield sse_event(network_update_info, "network_update")
+                    async for event in stream_chat_message(formatted_history + tool_messages):
+                        if "content" in event:
+                            content_chunks.append(event["content"])
+                            yield sse_event(event)
+
+                final_assistant_content = "".join(content_chunks) or "I have completed the requested action."
+                db_message = models.ChatMessage(content=message_content, role="user", user_id=user_id, conversation=turn_conversation)
+                db_response = models.ChatMessage(
+                    content=final_assistant_content,
+                    role="assistant",
+                    user_id=user_id,
+                    conversation=turn_conversation,
+                    meta_data=llm_response
+                )
+                stream_db.add_all([db_message, db_response])
+                await stream_db.commit()
+                append_history(turn_conversation.id, db_message)
+                append_history(turn_conversation.id, db_response)
+                yield sse_event({"success": True, "conversation_id": turn_conversation.id}, "done")
+            except Exception as e:
+                print(f"Error in /process/stream endpoint: {type(e).__name__}: {e}")
+                yield sse_event({"success": False, "content": f"An unexpected error occurred: {str(e)}"}, "error")
+
+    return StreamingResponse(stream_turn(), media_type="text/event-stream")
@@ -3,22 +3,32 @@ Network router for the API.
 Handles network data operations like import, export, and formatting for visualization.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Response
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Request, Response
 from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
 from typing import Dict, Any
+from collections import OrderedDict
 import networkx as nx
+import hashlib
 import io
-import json
+import os
+import orjson
 
 import models
 import schemas
 import auth
 from database import get_db
-import os
-import httpx
+from services.mcp_client import NETWORKX_MCP_URL, get_mcp_client
 
-# NetworkXMCPサーバーとの通信用URL
-NETWORKX_MCP_URL = os.environ.get("NETWORKX_MCP_URL", "http://networkx-mcp:8001")
+# Serializes large generated payloads (e.g. Cytoscape elements) to JSON bytes in one pass,
+# skipping response_model re-validation and jsonable_encoder's per-value walk
+_RESPONSE_ADAPTER = TypeAdapter(Dict[str, Any])
+
+# Serialized Cytoscape bodies keyed by the GraphML ETag (the GraphML itself is not kept),
+# bounded by the total size of the cached bodies in bytes
+CYTOSCAPE_CACHE_BYTES = int(os.environ.get("CYTOSCAPE_CACHE_BYTES", str(64 * 1024 * 1024)))
+_cytoscape_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_cytoscape_cache_bytes = 0
 
 router = APIRouter(
     prefix="/network",
@@ -42,37 +52,83 @@ def get_network_for_user(db: Session, network_id: int, user_id: int) -> models.N
         
     return db_network
 
+def graphml_etag(graphml_content: str) -> str:
+    """Strong ETag for a stored network, derived from its GraphML content."""
+    return '"' + hashlib.blake2b(graphml_content.encode("utf-8"), digest_size=16).hexdigest() + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the request's If-None-Match header already names this ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def _build_cytoscape_body(graphml_content: str) -> bytes:
+    """Serialize a GraphML document as Cytoscape.js elements."""
+    G = nx.read_graphml(io.StringIO(graphml_content))
+    
+    # 位置情報もCytoscape形式に含める
+    nodes = []
+    for n, data in G.nodes(data=True):
+        node_data = {"data": {"id": str(n), **data}}
+        x = data.get('x')
+        y = data.get('y')
+        if x is not None and y is not None:
+            node_data["position"] = {"x": x, "y": y}
+        nodes.append(node_data)
+        
+    edges = [{"data": {"source": str(u), "target": str(v), **d}} for u, v, d in G.edges(data=True)]
+    
+    return _RESPONSE_ADAPTER.dump_json({"elements": {"nodes": nodes, "edges": edges}})
+
+def _cytoscape_body(etag: str, graphml_content: str) -> bytes:
+    """Serialized Cytoscape.js elements for a network, reused while its ETag is unchanged."""
+    global _cytoscape_cache_bytes
+    body = _cytoscape_cache.get(etag)
+    if body is not None:
+        _cytoscape_cache.move_to_end(etag)
+        return body
+
+    body = _build_cytoscape_body(graphml_content)
+    if len(body) <= CYTOSCAPE_CACHE_BYTES:
+        _cytoscape_cache[etag] = body
+        _cytoscape_cache_bytes += len(body)
+        while _cytoscape_cache_bytes > CYTOSCAPE_CACHE_BYTES:
+            _cytoscape_cache_bytes -= len(_cytoscape_cache.popitem(last=False)[1])
+    return body
+
 @router.get("/{network_id}/cytoscape", response_model=Dict[str, Any])
 async def get_network_cytoscape_format(
     network_id: int,
+    request: Request,
     current_user: models.User = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Get network data in Cytoscape.js JSON format.
+    
+    Responses carry an ETag of the stored GraphML, so clients polling an
+    unchanged network get a 304 without the payload being rebuilt.
     """
     db_network = get_network_for_user(db, network_id, current_user.id)
+    etag = graphml_etag(db_network.graphml_content)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
     
     try:
-        G = nx.read_graphml(io.StringIO(db_network.graphml_content))
-        
-        # 位置情報もCytoscape形式に含める
-        nodes = []
-        for n, data in G.nodes(data=True):
-            node_data = {"data": {"id": str(n), **data}}
-            if 'x' in data and 'y' in data:
-                node_data["position"] = {"x": data['x'], "y": data['y']}
-            nodes.append(node_data)
-            
-        edges = [{"data": {"source": str(u), "target": str(v), **d}} for u, v, d in G.edges(data=True)]
-        
-        return {"elements": {"nodes": nodes, "edges": edges}}
+        return Response(
+            content=_cytoscape_body(etag, db_network.graphml_content),
+            media_type="application/json",
+            headers={"ETag": etag}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing GraphML: {str(e)}")
 
 @router.get("/{network_id}/export")
 async def export_network_graphml(
     network_id: int,
+    request: Request,
     current_user: models.User = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -80,10 +136,16 @@ async def export_network_graphml(
     Export the network as a GraphML file.
     """
     db_network = get_network_for_user(db, network_id, current_user.id)
+    etag = graphml_etag(db_network.graphml_content)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
     return Response(
         content=db_network.graphml_content,
         media_type="application/xml",
-        headers={"Content-Disposition": f"attachment; filename=network_{network_id}.graphml"}
+        headers={
+            "Content-Disposition": f"attachment; filename=network_{network_id}.graphml",
+            "ETag": etag
+        }
     )
 
 @router.post("/upload", response_model=Dict[str, int])
@@ -104,29 +166,30 @@ async def upload_new_network(
         graphml_content_str = graphml_content_bytes.decode("utf-8")
 
         # Call NetworkXMCP to convert/normalize the GraphML
-        async with httpx.AsyncClient() as client:
-            url = f"{NETWORKX_MCP_URL}/tools/convert_graphml"
-            payload = {"graphml_content": graphml_content_str}
-            print(f"Sending GraphML to NetworkXMCP for conversion: {url}")
-            
-            response = await client.post(url, json=payload, timeout=60.0)
-            print(f"Response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                error_msg = f"Error from NetworkXMCP: {response.text}"
-                print(f"Error: {error_msg}")
-                raise HTTPException(status_code=500, detail=error_msg)
-            
-            result = response.json()
-            print(f"Response from NetworkXMCP: {result}")
-            
-            if not result.get("success"):
-                error_msg = result.get("error", "Unknown error from NetworkXMCP")
-                print(f"Error: {error_msg}")
-                raise HTTPException(status_code=500, detail=error_msg)
-            
-            normalized_graphml_str = result.get("graphml_content", "")
-            print(f"Normalized GraphML length: {len(normalized_graphml_str)}")
+        client = get_mcp_client()
+        url = f"{NETWORKX_MCP_URL}/tools/convert_graphml"
+        payload = {"graphml_content": graphml_content_str}
+        print(f"Sending GraphML to NetworkXMCP for conversion: {url}")
+        
+        response = await client.post(
+            url, content=orjson.dumps(payload), headers={"Content-Type": "application/json"}, timeout=60.0
+        )
+        print(f"Response status: {response.status_code}")
+        
+        if response.status_code != 200:
+            error_msg = f"Error from NetworkXMCP: {response.text}"
+            print(f"Error: {error_msg}")
+            raise HTTPException(status_code=500, detail=error_msg)
+        
+        result = orjson.loads(response.content)
+        
+        if not result.get("success"):
+            error_msg = result.get("error", "Unknown error from NetworkXMCP")
+            print(f"Error: {error_msg}")
+            raise HTTPException(status_code=500, detail=error_msg)
+        
+        normalized_graphml_str = result.get("graphml_content", "")
+        print(f"Normalized GraphML length: {len(normalized_graphml_str)}")
 
         # Create a new conversation
         db_conversation = models.Conversation(
@@ -159,6 +222,7 @@ async def upload_new_network(
 @router.post("/{conversation_id}/upload", response_model=schemas.Network)
 async def upload_and_overwrite_network(
     conversation_id: int,
+    request: Request,
     file: UploadFile = File(...),
     current_user: models.User = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
@@ -187,35 +251,42 @@ async def upload_and_overwrite_network(
         graphml_content_str = graphml_content_bytes.decode("utf-8")
 
         # Call NetworkXMCP to convert/normalize the GraphML
-        async with httpx.AsyncClient() as client:
-            url = f"{NETWORKX_MCP_URL}/tools/convert_graphml"
-            payload = {"graphml_content": graphml_content_str}
-            print(f"Sending GraphML to NetworkXMCP for conversion: {url}")
-            
-            response = await client.post(url, json=payload, timeout=60.0)
-            print(f"Response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                error_msg = f"Error from NetworkXMCP: {response.text}"
-                print(f"Error: {error_msg}")
-                raise HTTPException(status_code=500, detail=error_msg)
-            
-            result = response.json()
-            print(f"Response from NetworkXMCP: {result}")
-            
-            if not result.get("success"):
-                error_msg = result.get("error", "Unknown error from NetworkXMCP")
-                print(f"Error: {error_msg}")
-                raise HTTPException(status_code=500, detail=error_msg)
-            
-            normalized_graphml_str = result.get("graphml_content", "")
-            print(f"Normalized GraphML length: {len(normalized_graphml_str)}")
+        client = get_mcp_client()
+        url = f"{NETWORKX_MCP_URL}/tools/convert_graphml"
+        payload = {"graphml_content": graphml_content_str}
+        print(f"Sending GraphML to NetworkXMCP for conversion: {url}")
+        
+        response = await client.post(
+            url, content=orjson.dumps(payload), headers={"Content-Type": "application/json"}, timeout=60.0
+        )
+        print(f"Response status: {response.status_code}")
+        
+        if response.status_code != 200:
+            error_msg = f"Error from NetworkXMCP: {response.text}"
+            print(f"Error: {error_msg}")
+            raise HTTPException(status_code=500, detail=error_msg)
+        
+        result = orjson.loads(response.content)
+        
+        if not result.get("success"):
+            error_msg = result.get("error", "Unknown error from NetworkXMCP")
+            print(f"Error: {error_msg}")
+            raise HTTPException(status_code=500, detail=error_msg)
+        
+        normalized_graphml_str = result.get("graphml_content", "")
+        print(f"Normalized GraphML length: {len(normalized_graphml_str)}")
 
         # Update the network content
         db_network.graphml_content = normalized_graphml_str
         db_network.name = file.filename
         db.commit()
         db.refresh(db_network)
+
+        # Let the user's open clients reload the network (handled as "graph_updated" by the frontend)
+        await request.app.state.ws_manager.broadcast(
+            {"event": "graph_updated", "network_id": db_network.id, "conversation_id": conversation_id},
+            user_id=current_user.id
+        )
         
         return db_network
     except HTTPException as e:
@@ -1,7 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-import json
 
 # --- User Schemas ---
 class UserBase(BaseModel):
@@ -80,7 +79,7 @@ class ChatMessage(ChatMessageBase):
     id: int
     user_id: int
     conversation_id: int
-    meta_data: Optional[str] = "{}"
+    meta_data: Optional[Dict[str, Any]] = None
     created_at: datetime
 
     model_config = {
@@ -89,7 +88,4 @@ class ChatMessage(ChatMessageBase):
 
     def get_metadata(self) -> Dict[str, Any]:
         """Get metadata as a dictionary."""
-        try:
-            return json.loads(self.meta_data)
-        except (json.JSONDecodeError, TypeError):
-            return {}
+        return self.meta_data or {}
@@ -4,9 +4,10 @@ Supports multiple providers like Google Gemini and OpenAI.
 """
 
 import os
-import json
+import asyncio
+import orjson
 import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Iterator
 
 # --- Provider Selection ---
 LLM_PROVIDER = os.environ.get("LLM_PROVIDER", "google").lower()
@@ -57,6 +58,20 @@ TOOLS_DEFINITION = [
                     "description": "The type of centrality to calculate.",
                     "enum": ["degree", "closeness", "betweenness", "eigenvector", "pagerank"]
                 },
+                "centrality_params": {
+                    "type": "object",
+                    "description": "Optional parameters for betweenness/closeness. Large graphs are approximated by sampling automatically.",
+                    "properties": {
+                        "approximate": {
+                            "type": "boolean",
+                            "description": "Estimate from k sampled source nodes (O(k*m)) instead of the exact computation."
+                        },
+                        "k": {
+                            "type": "integer",
+                            "description": "Number of sampled source nodes when approximating (default: sqrt of the node count)."
+                        }
+                    }
+                },
             },
             "required": ["centrality_type"]
         }
@@ -70,7 +85,7 @@ TOOLS_DEFINITION = [
                 "layout_type": {
                     "type": "string",
                     "description": "The layout algorithm to apply.",
-                    "enum": ["spring", "circular", "random", "spectral", "shell", "kamada_kawai", "fruchterman_reingold"]
+                    "enum": ["spring", "circular", "random", "spectral", "shell", "kamada_kawai", "fruchterman_reingold", "community"]
                 }
             },
             "required": ["layout_type"]
@@ -83,6 +98,24 @@ TOOLS_DEFINITION = [
     },
 ]
 
+# Gemini takes all function declarations in a single tool, so the payload is
+# built once at import time instead of wrapping each function per request.
+GEMINI_TOOLS = [
+    {
+        "function_declarations": [
+            {
+                "name": tool["name"],
+                "description": tool["description"],
+                "parameters": tool["parameters"]
+            }
+            for tool in TOOLS_DEFINITION
+        ]
+    }
+]
+
+# OpenAI expects each function wrapped in a {"type": "function"} entry.
+OPENAI_TOOLS = [{"type": "function", "function": tool} for tool in TOOLS_DEFINITION]
+
 # --- System Prompt ---
 SYSTEM_PROMPT = """
 You are an expert network analysis assistant. Your role is to help users analyze and visualize network graphs.
@@ -97,48 +130,61 @@ You have access to a set of tools to perform network operations. When a user ask
 **Your Final Output should be either a direct text response OR a tool call.**
 """
 
-async def _process_with_gemini(messages: List[Dict[str, str]]) -> Dict[str, Any]:
-    """Process messages using Google Gemini."""
-    if not gemini_client:
-        return {"content": "Error: Gemini client is not initialized."}
+# Message roles sent to Gemini as "user"; everything else is sent as "model".
+GEMINI_USER_ROLES = frozenset(("user", "tool"))
+
+_STREAM_END = object()
 
+async def _iterate_in_thread(iterator: Iterator[Any]) -> AsyncIterator[Any]:
+    """Iterate a blocking SDK stream, fetching each chunk in a worker thread."""
+    while True:
+        item = await asyncio.to_thread(next, iterator, _STREAM_END)
+        if item is _STREAM_END:
+            return
+        yield item
+
+def _gemini_history(messages: List[Dict[str, str]]):
+    """Convert messages to Gemini history; returns (history, last user prompt)."""
     gemini_history = []
     for msg in messages:
-        role = "user" if msg["role"] in ["user", "tool"] else "model"
+        role = "user" if msg["role"] in GEMINI_USER_ROLES else "model"
         gemini_history.append(types.Content(role=role, parts=[types.Part.from_text(text=msg["content"])]))
     
     user_prompt = gemini_history.pop().parts[0].text
+    return gemini_history, user_prompt
 
-    try:
-        # Gemini用にツール定義を変換
-        gemini_tools = []
-        for tool in TOOLS_DEFINITION:
-            gemini_tool = {
-                "function_declarations": [
-                    {
-                        "name": tool["name"],
-                        "description": tool["description"],
-                        "parameters": tool["parameters"]
-                    }
-                ]
-            }
-            gemini_tools.append(gemini_tool)
+def _openai_history(messages: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Adapt history for OpenAI format."""
+    openai_history = []
+    for msg in messages:
+        if msg["role"] == "tool":
+            openai_history.append({"role": "tool", "tool_call_id": "placeholder_id", "name": "tool_name", "content": msg["content"]})
+        else:
+            openai_history.append({"role": msg["role"], "content": msg["content"]})
+    return openai_history
+
+async def _process_with_gemini(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Process messages using Google Gemini."""
+    if not gemini_client:
+        return {"content": "Error: Gemini client is not initialized."}
 
+    gemini_history, user_prompt = _gemini_history(messages)
+
+    try:
         chat = gemini_client.chats.create(model="gemini-2.5-pro", history=gemini_history)
         response = chat.send_message(
             user_prompt,
-            config=types.GenerateContentConfig(system_instruction=SYSTEM_PROMPT, tools=gemini_tools)
+            config=types.GenerateContentConfig(system_instruction=SYSTEM_PROMPT, tools=GEMINI_TOOLS)
         )
 
         if response.function_calls:
-            function_call = response.function_calls[0]
             return {
                 "tool_calls": [{
                     "function": {
                         "name": function_call.name,
                         "arguments": dict(function_call.args)
                     }
-                }]
+                } for function_call in response.function_calls]
             }
         else:
             return {"content": response.text}
@@ -151,19 +197,13 @@ async def _process_with_openai(messages: List[Dict[str, str]]) -> Dict[str, Any]
     if not openai_client:
         return {"content": "Error: OpenAI client is not initialized."}
 
-    # Adapt history for OpenAI format
-    openai_history = []
-    for msg in messages:
-        if msg["role"] == "tool":
-            openai_history.append({"role": "tool", "tool_call_id": "placeholder_id", "name": "tool_name", "content": msg["content"]})
-        else:
-            openai_history.append({"role": msg["role"], "content": msg["content"]})
+    openai_history = _openai_history(messages)
     
     try:
         response = openai_client.chat.completions.create(
             model=os.environ.get("OPENAI_MODEL", "gpt-4o"),
             messages=[{"role": "system", "content": SYSTEM_PROMPT}] + openai_history,
-            tools=[{"type": "function", "function": f} for f in TOOLS_DEFINITION],
+            tools=OPENAI_TOOLS,
             tool_choice="auto",
         )
         
@@ -171,15 +211,14 @@ async def _process_with_openai(messages: List[Dict[str, str]]) -> Dict[str, Any]
         tool_calls = response_message.tool_calls
 
         if tool_calls:
-            # OpenAI can return multiple tool calls, we'll take the first one for simplicity
-            tool_call = tool_calls[0]
+            # OpenAI can return several (parallel) tool calls; the caller runs them all
             return {
                 "tool_calls": [{
                     "function": {
                         "name": tool_call.function.name,
-                        "arguments": json.loads(tool_call.function.arguments)
+                        "arguments": orjson.loads(tool_call.function.arguments)
                     }
-                }]
+                } for tool_call in tool_calls]
             }
         else:
             return {"content": response_message.content}
@@ -187,15 +226,116 @@ async def _process_with_openai(messages: List[Dict[str, str]]) -> Dict[str, Any]
         print(f"Error with OpenAI: {e}")
         return {"content": f"Error with OpenAI: {e}"}
 
+async def _stream_with_gemini(messages: List[Dict[str, str]]) -> AsyncIterator[Dict[str, Any]]:
+    """Stream a Gemini response as {"content": chunk} events, or a final {"tool_calls": [...]}."""
+    if not gemini_client:
+        yield {"content": "Error: Gemini client is not initialized."}
+        return
+
+    gemini_history, user_prompt = _gemini_history(messages)
+
+    try:
+        chat = gemini_client.chats.create(model="gemini-2.5-pro", history=gemini_history)
+        stream = await asyncio.to_thread(
+            chat.send_message_stream,
+            user_prompt,
+            config=types.GenerateContentConfig(system_instruction=SYSTEM_PROMPT, tools=GEMINI_TOOLS)
+        )
+        function_calls = []
+        async for chunk in _iterate_in_thread(iter(stream)):
+            if chunk.function_calls:
+                function_calls.extend(chunk.function_calls)
+            elif chunk.text:
+                yield {"content": chunk.text}
+        if function_calls:
+            yield {
+                "tool_calls": [{
+                    "function": {
+                        "name": function_call.name,
+                        "arguments": dict(function_call.args)
+                    }
+                } for function_call in function_calls]
+            }
+    except Exception as e:
+        print(f"Error with Gemini: {e}")
+        yield {"content": f"Error with Gemini: {e}"}
+
+async def _stream_with_openai(messages: List[Dict[str, str]]) -> AsyncIterator[Dict[str, Any]]:
+    """Stream an OpenAI response as {"content": chunk} events, or a final {"tool_calls": [...]}."""
+    if not openai_client:
+        yield {"content": "Error: OpenAI client is not initialized."}
+        return
+
+    openai_history = _openai_history(messages)
+
+    try:
+        stream = await asyncio.to_thread(
+            openai_client.chat.completions.create,
+            model=os.environ.get("OPENAI_MODEL", "gpt-4o"),
+            messages=[{"role": "system", "content": SYSTEM_PROMPT}] + openai_history,
+            tools=OPENAI_TOOLS,
+            tool_choice="auto",
+            stream=True,
+        )
+        # Tool calls arrive as fragments keyed by their index; assemble them before yielding
+        calls: Dict[int, Dict[str, Any]] = {}
+        async for chunk in _iterate_in_thread(iter(stream)):
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                yield {"content": delta.content}
+            for tool_call in delta.tool_calls or []:
+                call = calls.setdefault(tool_call.index, {"name": "", "arguments": []})
+                if tool_call.function.name:
+                    call["name"] += tool_call.function.name
+                if tool_call.function.arguments:
+                    call["arguments"].append(tool_call.function.arguments)
+        if calls:
+            yield {
+                "tool_calls": [{
+                    "function": {
+                        "name": call["name"],
+                        "arguments": orjson.loads("".join(call["arguments"]) or "{}")
+                    }
+                } for _, call in sorted(calls.items())]
+            }
+    except Exception as e:
+        print(f"Error with OpenAI: {e}")
+        yield {"content": f"Error with OpenAI: {e}"}
+
+
+# Provider name -> handler coroutine, looked up once per message.
+PROVIDER_HANDLERS = {
+    "openai": _process_with_openai,
+    "google": _process_with_gemini,
+}
+
+# Provider name -> streaming handler (async generator).
+PROVIDER_STREAM_HANDLERS = {
+    "openai": _stream_with_openai,
+    "google": _stream_with_gemini,
+}
 
 async def process_chat_message(messages: List[Dict[str, str]]) -> Dict[str, Any]:
     """
     Process chat messages by routing to the configured LLM provider.
     """
     print(f"Processing message with provider: {LLM_PROVIDER}")
-    if LLM_PROVIDER == "openai":
-        return await _process_with_openai(messages)
-    elif LLM_PROVIDER == "google":
-        return await _process_with_gemini(messages)
-    else:
+    handler = PROVIDER_HANDLERS.get(LLM_PROVIDER)
+    if handler is None:
         return {"content": f"Error: Unknown LLM_PROVIDER '{LLM_PROVIDER}'. Please set to 'google' or 'openai'."}
+    return await handler(messages)
+
+async def stream_chat_message(messages: List[Dict[str, str]]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a response from the configured LLM provider.
+    Yields {"content": text_chunk} events as text is generated, or a single
+    {"tool_calls": [...]} event (same shape as process_chat_message) if the model calls tools.
+    """
+    handler = PROVIDER_STREAM_HANDLERS.get(LLM_PROVIDER)
+    if handler is None:
+        yield {"content": f"Error: Unknown LLM_PROVIDER '{LLM_PROVIDER}'. Please set to 'google' or 'openai'."}
+        return
+    async for event in handler(messages):
+        yield event
@@ -0,0 +1,85 @@
+"""
+Shared HTTP client for calls to the NetworkXMCP server.
+"""
+
+from typing import Any, Dict, Optional
+import importlib.util
+import os
+import sys
+import httpx
+import orjson
+
+# Base URL of the NetworkXMCP server. "local" serves tool calls from NetworkXMCP's ASGI app
+# inside this process (for single-host deployments), skipping the loopback TCP hop
+NETWORKX_MCP_URL = os.environ.get("NETWORKX_MCP_URL", "http://networkx-mcp:8001")
+MCP_LOCAL = NETWORKX_MCP_URL == "local"
+if MCP_LOCAL:
+    NETWORKX_MCP_URL = "http://networkx-mcp.local"
+# Source directory of NetworkXMCP, imported in local mode
+NETWORKX_MCP_PATH = os.environ.get(
+    "NETWORKX_MCP_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "NetworkXMCP")
+)
+
+# One pooled client per process, so requests to NetworkXMCP reuse keep-alive
+# connections instead of opening a new TCP connection per call
+_mcp_client: Optional[httpx.AsyncClient] = None
+
+def _load_local_mcp_app():
+    """
+    Import NetworkXMCP's FastAPI app from NETWORKX_MCP_PATH.
+    
+    Its main module is loaded under a distinct name, since the API's own entry point is also "main".
+    """
+    if NETWORKX_MCP_PATH not in sys.path:
+        sys.path.insert(0, NETWORKX_MCP_PATH)
+    spec = importlib.util.spec_from_file_location("networkx_mcp_main", os.path.join(NETWORKX_MCP_PATH, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+def get_mcp_client() -> httpx.AsyncClient:
+    """
+    Get the shared AsyncClient for NetworkXMCP, creating it on first use.
+    
+    Returns:
+        The pooled httpx.AsyncClient
+    """
+    global _mcp_client
+    if _mcp_client is None or _mcp_client.is_closed:
+        if MCP_LOCAL:
+            # Requests are dispatched straight to the ASGI app; responses keep the HTTP contract
+            _mcp_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=_load_local_mcp_app()), timeout=60.0)
+            return _mcp_client
+        _mcp_client = httpx.AsyncClient(
+            timeout=60.0,
+            # Keep idle connections across the gaps between tool calls (an LLM round-trip often
+            # exceeds httpx's 5 s default); NetworkXMCP's server keep-alive timeout is longer
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200, keepalive_expiry=30.0)
+        )
+    return _mcp_client
+
+async def post_mcp_tool(url: str, payload: Dict[str, Any]) -> httpx.Response:
+    """
+    POST a tool call to NetworkXMCP on the shared client.
+    
+    Repeated calls are not cached here: NetworkXMCP already caches parsed graphs and
+    computed results keyed by the GraphML it receives.
+    
+    Args:
+        url: Full URL of the tool endpoint
+        payload: JSON request body
+        
+    Returns:
+        The (already read) httpx.Response
+    """
+    return await get_mcp_client().post(
+        url, content=orjson.dumps(payload, default=str), headers={"Content-Type": "application/json"}
+    )
+
+async def close_mcp_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _mcp_client
+    if _mcp_client is not None:
+        await _mcp_client.aclose()
+        _mcp_client = None
@@ -13,9 +13,12 @@ from .layout_functions import (
     calculate_shell_layout,
     calculate_kamada_kawai_layout,
     calculate_fruchterman_reingold_layout,
+    calculate_spring_lbfgs_layout,
+    calculate_spring_numba_layout,
     calculate_spiral_layout,
     calculate_multipartite_layout,
     calculate_bipartite_layout,
+    calculate_community_layout,
     get_layout_function
 )
 
@@ -27,8 +30,11 @@ __all__ = [
     'calculate_shell_layout',
     'calculate_kamada_kawai_layout',
     'calculate_fruchterman_reingold_layout',
+    'calculate_spring_lbfgs_layout',
+    'calculate_spring_numba_layout',
     'calculate_spiral_layout',
     'calculate_multipartite_layout',
     'calculate_bipartite_layout',
+    'calculate_community_layout',
     'get_layout_function'
 ]
@@ -0,0 +1,157 @@
+"""
+Numba版Fruchterman-Reingoldレイアウト
+===================
+
+Fruchterman-Reingoldの力学シミュレーションの1ステップ（全ノード対の斥力と
+エッジの引力の集計）をNumbaでネイティブコードにコンパイルし、ノード単位で並列に計算します。
+numbaはオプションの依存関係で、インストールされていない場合は
+NetworkXのスプリングレイアウトで計算します。
+"""
+
+import logging
+import os
+
+import networkx as nx
+import numpy as np
+
+# ロギングの設定
+logger = logging.getLogger("networkx_mcp.layouts.fr_numba")
+
+try:
+    import numba
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE and "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ:
+    # TBBレイヤーはワーカースレッド（テストクライアントのポータル等）から
+    # 並列カーネルを起動するとプロセス終了時に停止することがあるため、OpenMPを優先する
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _fr_step(pos, indptr, indices, weights, k, t):
+        """
+        FRの1ステップを計算し、位置をその場で更新する
+
+        Args:
+            pos (np.ndarray): ノード位置 (n, dim)
+            indptr, indices, weights (np.ndarray): 隣接行列のCSR表現
+            k (float): 最適距離
+            t (float): 温度（1ステップの最大移動量）
+
+        Returns:
+            float: 移動量の2乗和（収束判定用）
+        """
+        n, dim = pos.shape
+        disp = np.zeros_like(pos)
+        delta = np.empty((n, dim))
+        for i in prange(n):
+            # 斥力（全ノード対）: k²/d
+            for j in range(n):
+                if i == j:
+                    continue
+                dist2 = 0.0
+                for c in range(dim):
+                    dist2 += (pos[i, c] - pos[j, c]) ** 2
+                dist2 = max(dist2, 1e-4)
+                for c in range(dim):
+                    disp[i, c] += (pos[i, c] - pos[j, c]) * k * k / dist2
+            # 引力（隣接ノードのみ）: w·d²/k
+            for p in range(indptr[i], indptr[i + 1]):
+                j = indices[p]
+                if i == j:
+                    continue
+                dist2 = 0.0
+                for c in range(dim):
+                    dist2 += (pos[i, c] - pos[j, c]) ** 2
+                dist = max(np.sqrt(dist2), 0.01)
+                for c in range(dim):
+                    disp[i, c] -= (pos[i, c] - pos[j, c]) * weights[p] * dist / k
+            # 温度に応じて移動量を正規化
+            length = 0.0
+            for c in range(dim):
+                length += disp[i, c] ** 2
+            length = np.sqrt(length)
+            if length < 0.01:
+                length = 0.1
+            for c in range(dim):
+                delta[i, c] = disp[i, c] * t / length
+        moved = 0.0
+        for i in range(n):
+            for c in range(dim):
+                pos[i, c] += delta[i, c]
+                moved += delta[i, c] ** 2
+        return moved
+
+
+def calculate_spring_numba_layout(G, k=None, pos=None, iterations=50, threshold=1e-4, weight='weight', scale=1, center=None, dim=2, seed=None):
+    """
+    Numbaでコンパイルしたカーネルによるスプリングレイアウトを計算する
+
+    numbaがない場合やエラー時はnx.spring_layoutで計算する。
+
+    Args:
+        G (nx.Graph): NetworkXグラフ
+        k (float, optional): 最適距離（デフォルト: 1/sqrt(ノード数)）
+        pos (dict, optional): 初期位置
+        iterations (int, optional): 反復回数
+        threshold (float, optional): 収束閾値
+        weight (str, optional): エッジの重みの属性名
+        scale (float, optional): スケール
+        center (tuple, optional): 中心座標
+        dim (int, optional): 次元数
+        seed (int, optional): 乱数シード
+
+    Returns:
+        dict: ノードIDをキー、位置を値とする辞書
+    """
+    if not NUMBA_AVAILABLE:
+        return nx.spring_layout(G, k=k, pos=pos, iterations=iterations, threshold=threshold, weight=weight, scale=scale, center=center, dim=dim, seed=seed)
+    try:
+        nodelist = list(G)
+        n = len(nodelist)
+        if n == 0:
+            return {}
+        if n == 1:
+            return {nodelist[0]: np.zeros(dim) if center is None else np.asarray(center, dtype=float)}
+
+        A = nx.to_scipy_sparse_array(G, nodelist=nodelist, weight=weight, format="csr", dtype=np.float64)
+
+        if k is None:
+            k = np.sqrt(1.0 / n)
+
+        # 初期位置
+        rng = np.random.default_rng(seed)
+        coords = rng.random((n, dim))
+        if pos is not None:
+            for i, node in enumerate(nodelist):
+                if node in pos:
+                    coords[i] = np.asarray(pos[node], dtype=float)[:dim]
+
+        # 初期温度は配置範囲の1/10とし、反復ごとに線形に下げる
+        t = float(np.max(coords.max(axis=0) - coords.min(axis=0))) * 0.1
+        dt = t / (iterations + 1)
+        for _ in range(iterations):
+            moved = _fr_step(coords, A.indptr, A.indices, A.data, k, t)
+            t -= dt
+            if np.sqrt(moved) / n < threshold:
+                break
+
+        coords = nx.rescale_layout(coords, scale=scale)
+        if center is not None:
+            coords += np.asarray(center, dtype=float)
+        return dict(zip(nodelist, coords))
+    except Exception as e:
+        logger.error(f"Error calculating Numba spring layout: {e}")
+        # フォールバック: スプリングレイアウト
+        return nx.spring_layout(G, k=k, pos=pos, iterations=iterations, threshold=threshold, weight=weight, scale=scale, center=center, dim=dim, seed=seed)
+
+
+def warm_up():
+    """
+    カーネルを小さなグラフで一度実行し、最初のリクエストの前にJITコンパイルを済ませる
+    """
+    if NUMBA_AVAILABLE:
+        calculate_spring_numba_layout(nx.path_graph(3), iterations=1, seed=0)
@@ -9,10 +9,25 @@ import networkx as nx
 import numpy as np
 import logging
 import random
+import threading
+from collections import Counter
+
+from .fr_numba import calculate_spring_numba_layout
 
 # ロギングの設定
 logger = logging.getLogger("networkx_mcp.layouts.layout")
 
+try:
+    import pygraphviz  # noqa: F401
+    PYGRAPHVIZ_AVAILABLE = True
+except ImportError:
+    PYGRAPHVIZ_AVAILABLE = False
+
+# L-BFGSレイアウトで全ノード対の斥力を密行列で計算するノード数の上限
+LBFGS_MAX_NODES = 2000
+# コミュニティレイアウトで、まとめて一度に最小化するコミュニティのノード数の上限
+BLOCK_LAYOUT_MAX_COMMUNITY_SIZE = 64
+
 def calculate_spring_layout(G, k=None, pos=None, fixed=None, iterations=50, threshold=1e-4, weight='weight', scale=1.0, center=None, dim=2, seed=None):
     """
     スプリングレイアウトを計算する
@@ -184,6 +199,185 @@ def calculate_fruchterman_reingold_layout(G, k=None, pos=None, fixed=None, itera
         # フォールバック: スプリングレイアウト
         return nx.spring_layout(G, k=k, pos=pos, fixed=fixed, iterations=iterations, threshold=threshold, weight=weight, scale=scale, center=center, dim=dim, seed=seed)
 
+def _fr_energy_and_grad(flat, n, dim, rows, cols, weights, k, gravity):
+    """
+    Fruchterman-Reingoldのエネルギーとその勾配を計算する
+    
+    引力（エッジ）: w·d³/(3k)、斥力（全ノード対）: -k²·ln(d)、
+    重力（重心への引き戻し）: gravity·|x - 重心|²/2
+    各項の勾配がそれぞれFRの引力 d²/k、斥力 k²/d に対応する。
+    """
+    X = flat.reshape(n, dim)
+    grad = np.zeros_like(X)
+    
+    # 引力（エッジのみ）
+    delta_e = X[rows] - X[cols]
+    dist_e = np.sqrt(np.einsum('ij,ij->i', delta_e, delta_e))
+    energy = np.sum(weights * dist_e ** 3) / (3.0 * k)
+    force_e = (weights * dist_e / k)[:, None] * delta_e
+    np.add.at(grad, rows, force_e)
+    np.add.at(grad, cols, -force_e)
+    
+    # 斥力（全ノード対）
+    # n×n×dimの差分配列を作らず、|xi|² + |xj|² - 2·xi·xj（行列積）で距離の2乗を求める
+    sq = np.einsum('ij,ij->i', X, X)
+    dist2 = sq[:, None] + sq[None, :] - 2.0 * (X @ X.T)
+    np.fill_diagonal(dist2, 1.0)
+    np.maximum(dist2, 1e-12, out=dist2)
+    energy -= 0.25 * k * k * np.sum(np.log(dist2))
+    # Σj (xi - xj)/dij² = xi·Σj(1/dij²) - Σj(xj/dij²)
+    inv = 1.0 / dist2
+    np.fill_diagonal(inv, 0.0)
+    grad -= k * k * (X * inv.sum(axis=1)[:, None] - inv @ X)
+    
+    # 重力（非連結グラフの成分が離れすぎないようにする）
+    centered = X - X.mean(axis=0)
+    energy += 0.5 * gravity * np.sum(centered * centered)
+    grad += gravity * centered
+    
+    return energy, grad.ravel()
+
+def _fr_block_energy_and_grad(flat, n, dim, rows, cols, weights, pair_i, pair_j, k, block, sizes, gravity):
+    """
+    ブロック（コミュニティ）ごとに独立したFruchterman-Reingoldのエネルギーとその勾配を計算する
+    
+    _fr_energy_and_gradと同じエネルギーを、斥力は同じブロック内のノード対（pair_i < pair_j）、
+    重力は各ブロックの重心に限定して全ブロック分合計する。各ブロックのエネルギーは独立しているため、
+    まとめて最小化した結果はブロックごとに最小化した結果と一致する。
+    k はノードごとの最適距離（同じブロック内では同じ値）。
+    """
+    X = flat.reshape(n, dim)
+    grad = np.zeros_like(X)
+    
+    # 引力（ブロック内のエッジのみ）
+    k_e = k[rows]
+    delta_e = X[rows] - X[cols]
+    dist_e = np.sqrt(np.einsum('ij,ij->i', delta_e, delta_e))
+    energy = np.sum(weights * dist_e ** 3 / (3.0 * k_e))
+    force_e = (weights * dist_e / k_e)[:, None] * delta_e
+    np.add.at(grad, rows, force_e)
+    np.add.at(grad, cols, -force_e)
+    
+    # 斥力（同じブロック内のノード対のみ。計算量はブロックサイズの2乗和）
+    kk = k[pair_i] ** 2
+    delta_p = X[pair_i] - X[pair_j]
+    dist2 = np.maximum(np.einsum('ij,ij->i', delta_p, delta_p), 1e-12)
+    energy -= 0.5 * np.sum(kk * np.log(dist2))
+    force_p = (kk / dist2)[:, None] * delta_p
+    for d in range(dim):
+        grad[:, d] -= np.bincount(pair_i, weights=force_p[:, d], minlength=n)
+        grad[:, d] += np.bincount(pair_j, weights=force_p[:, d], minlength=n)
+    
+    # 重力（各ブロックの重心への引き戻し）
+    block_sum = np.zeros((len(sizes), dim))
+    np.add.at(block_sum, block, X)
+    centered = X - (block_sum / sizes[:, None])[block]
+    energy += 0.5 * gravity * np.sum(centered * centered)
+    grad += gravity * centered
+    
+    return energy, grad.ravel()
+
+def calculate_spring_lbfgs_layout(G, k=None, pos=None, fixed=None, iterations=100, threshold=1e-4, weight='weight', scale=1, center=None, dim=2, seed=None, gravity=1.0):
+    """
+    L-BFGS法によるスプリングレイアウトを計算する
+    
+    FRの力学シミュレーションを反復する代わりに、FRエネルギーを
+    scipy.optimize.minimize(method="L-BFGS-B")で直接最小化する。
+    少ない反復回数で収束し、最終的なエネルギーも低くなりやすい。
+    斥力は全ノード対の密行列で計算するため、LBFGS_MAX_NODESを超える
+    グラフはpygraphvizがあればGraphvizのSFDP（多階層の力学モデル）で計算し、
+    ない場合や固定ノードが指定された場合は通常のスプリングレイアウトを使用する。
+    
+    Args:
+        G (nx.Graph): NetworkXグラフ
+        k (float, optional): 最適距離（デフォルト: 1/sqrt(ノード数)）
+        pos (dict, optional): 初期位置
+        fixed (list, optional): 固定するノードのリスト（通常のスプリングレイアウトで計算）
+        iterations (int, optional): 最大反復回数
+        threshold (float, optional): 収束閾値（通常のスプリングレイアウトで計算する場合のみ使用）
+        weight (str, optional): エッジの重みの属性名
+        scale (float, optional): スケール
+        center (tuple, optional): 中心座標
+        dim (int, optional): 次元数
+        seed (int, optional): 乱数シード
+        gravity (float, optional): 重心への引き戻しの強さ
+        
+    Returns:
+        dict: ノードIDをキー、位置を値とする辞書
+    """
+    try:
+        from scipy.optimize import minimize
+        
+        nodelist = list(G)
+        n = len(nodelist)
+        if n == 0:
+            return {}
+        if n == 1:
+            return {nodelist[0]: np.zeros(dim) if center is None else np.asarray(center, dtype=float)}
+        if n > LBFGS_MAX_NODES and fixed is None and pos is None and dim == 2 and PYGRAPHVIZ_AVAILABLE:
+            return _calculate_sfdp_layout(G, scale=scale, center=center, seed=seed)
+        if n > LBFGS_MAX_NODES or fixed is not None:
+            return nx.spring_layout(G, k=k, pos=pos, fixed=fixed, iterations=iterations, threshold=threshold, weight=weight, scale=scale, center=center, dim=dim, seed=seed)
+        
+        # エッジ（上三角）と重みを取り出す
+        A = nx.to_scipy_sparse_array(G, nodelist=nodelist, weight=weight, format="csr")
+        A = (A + A.T).tocoo()
+        upper = A.row < A.col
+        rows, cols = A.row[upper], A.col[upper]
+        weights = A.data[upper].astype(float)
+        if not G.is_directed():
+            weights = weights / 2.0
+        
+        if k is None:
+            k = 1.0 / np.sqrt(n)
+        
+        # 初期位置
+        rng = np.random.default_rng(seed)
+        x0 = rng.random((n, dim))
+        if pos is not None:
+            for i, node in enumerate(nodelist):
+                if node in pos:
+                    x0[i] = np.asarray(pos[node], dtype=float)[:dim]
+        
+        result = minimize(
+            _fr_energy_and_grad,
+            x0.ravel(),
+            args=(n, dim, rows, cols, weights, k, gravity),
+            jac=True,
+            method="L-BFGS-B",
+            options={"maxiter": iterations}
+        )
+        
+        coords = nx.rescale_layout(result.x.reshape(n, dim), scale=scale)
+        if center is not None:
+            coords += np.asarray(center, dtype=float)
+        return dict(zip(nodelist, coords))
+    except Exception as e:
+        logger.error(f"Error calculating L-BFGS spring layout: {e}")
+        # フォールバック: スプリングレイアウト
+        return nx.spring_layout(G, k=k, pos=pos, fixed=fixed, iterations=iterations, threshold=threshold, weight=weight, scale=scale, center=center, dim=dim, seed=seed)
+
+def _calculate_sfdp_layout(G, scale=1, center=None, seed=None):
+    """
+    GraphvizのSFDPで大規模グラフの2次元レイアウトを計算する
+    
+    Args:
+        G (nx.Graph): NetworkXグラフ
+        scale (float, optional): スケール
+        center (tuple, optional): 中心座標
+        seed (int, optional): 乱数シード
+        
+    Returns:
+        dict: ノードIDをキー、位置を値とする辞書
+    """
+    args = f"-Gstart={seed}" if seed is not None else ""
+    pos = nx.nx_agraph.graphviz_layout(G, prog="sfdp", args=args)
+    nodelist = list(pos)
+    coords = nx.rescale_layout(np.asarray([pos[node] for node in nodelist], dtype=float), scale=scale)
+    if center is not None:
+        coords += np.asarray(center, dtype=float)
+    return dict(zip(nodelist, coords))
+
 def calculate_spiral_layout(G, scale=1, center=None, dim=2, resolution=0.35, equidistant=False):
     """
     スパイラルレイアウトを計算する
@@ -222,9 +416,11 @@ def calculate_multipartite_layout(G, subset_key='subset', align='vertical', scal
     """
     try:
         # ノードに部分集合属性がない場合は、次数に基づいて割り当て
-        for node in G.nodes():
-            if subset_key not in G.nodes[node]:
-                G.nodes[node][subset_key] = G.degree(node) % 3
+        # （ノードごとにG.degree(node)でビューを作らず、次数は一度の走査で取得する）
+        for node, degree in G.degree():
+            attrs = G.nodes[node]
+            if subset_key not in attrs:
+                attrs[subset_key] = degree % 3
         
         return nx.multipartite_layout(G, subset_key=subset_key, align=align, scale=scale, center=center)
     except Exception as e:
@@ -253,6 +449,239 @@ def calculate_bipartite_layout(G, nodes, align='vertical', scale=1, center=None)
         # フォールバック: シェルレイアウト
         return nx.shell_layout(G, scale=scale, center=center)
 
+# igraphの乱数生成器の差し替えを直列化するロック
+_IGRAPH_RNG_LOCK = threading.Lock()
+
+def _leiden_communities(G, seed=None):
+    """
+    igraph（C実装）のLeiden法でモジュラリティを最大化するコミュニティを検出する
+    
+    Args:
+        G (nx.Graph): 無向グラフ
+        seed (int, optional): 乱数シード
+        
+    Returns:
+        list: ノード集合のリスト
+    """
+    import igraph as ig
+    
+    nodelist = list(G)
+    node_index = {node: i for i, node in enumerate(nodelist)}
+    g_ig = ig.Graph(n=len(nodelist), edges=[(node_index[u], node_index[v]) for u, v in G.edges()])
+    # igraphの乱数生成器を一時的にシード付きのものに差し替え、結果を再現可能にする
+    # （乱数生成器はプロセス全体で共有されるため、スレッド間で差し替えが重ならないようロックする）
+    with _IGRAPH_RNG_LOCK:
+        ig.set_random_number_generator(random.Random(seed))
+        try:
+            membership = g_ig.community_leiden(objective_function="modularity", n_iterations=-1).membership
+        finally:
+            ig.set_random_number_generator(random)
+    groups = {}
+    for node, community_id in zip(nodelist, membership):
+        groups.setdefault(community_id, set()).add(node)
+    return list(groups.values())
+
+def _detect_communities(G, seed=None):
+    """
+    コミュニティを検出する
+    
+    python-igraphがインストールされていればLeiden法（C実装）を使用し、
+    ない場合はNetworkXのLouvain法（モジュラリティ差分で移動を評価する実装）を使用する。
+    
+    Args:
+        G (nx.Graph): 無向グラフ
+        seed (int, optional): 乱数シード
+        
+    Returns:
+        list: ノード集合のリスト
+    """
+    try:
+        return _leiden_communities(G, seed=seed)
+    except ImportError:
+        return [set(c) for c in nx.community.louvain_communities(G, seed=seed)]
+
+def _calculate_block_lbfgs_layout(G, communities, centers, scale=1, seed=None, weight='weight', iterations=100, gravity=1.0):
+    """
+    各コミュニティ内のL-BFGSスプリングレイアウトを一度の最小化でまとめて計算する
+    
+    コミュニティ内のエッジのみからなるブロック対角の隣接行列を作り、
+    _fr_block_energy_and_gradを全ノードについて一度だけ最小化する。
+    コミュニティごとにcalculate_spring_lbfgs_layoutを呼ぶ場合と同じエネルギーを最小化するが、
+    隣接行列の変換や最適化の準備をコミュニティの数だけ繰り返さない。
+    
+    Args:
+        G (nx.Graph): NetworkXグラフ
+        communities (list): ノード集合のリスト
+        centers (list): 各コミュニティの中心座標
+        scale (float, optional): 各コミュニティの配置のスケール
+        seed (int, optional): 乱数シード
+        weight (str, optional): エッジの重みの属性名
+        iterations (int, optional): 最大反復回数
+        gravity (float, optional): 各コミュニティの重心への引き戻しの強さ
+        
+    Returns:
+        dict: ノードIDをキー、位置を値とする辞書
+    """
+    from scipy.optimize import minimize
+    
+    dim = 2
+    nodelist = [node for members in communities for node in members]
+    n = len(nodelist)
+    sizes = np.array([len(members) for members in communities])
+    block = np.repeat(np.arange(len(communities)), sizes)
+    
+    # コミュニティ内のエッジ（上三角）と重みを取り出す
+    A = nx.to_scipy_sparse_array(G, nodelist=nodelist, weight=weight, format="csr")
+    A = (A + A.T).tocoo()
+    keep = (A.row < A.col) & (block[A.row] == block[A.col])
+    rows, cols = A.row[keep], A.col[keep]
+    weights = A.data[keep].astype(float)
+    if not G.is_directed():
+        weights = weights / 2.0
+    
+    # 最適距離はコミュニティごとに 1/sqrt(コミュニティのノード数)
+    k = (1.0 / np.sqrt(sizes))[block]
+    
+    # 斥力を計算するコミュニティ内のノード対
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    pairs = [np.triu_indices(size, 1) for size in sizes]
+    pair_i = np.concatenate([i + offset for (i, _), offset in zip(pairs, offsets)])
+    pair_j = np.concatenate([j + offset for (_, j), offset in zip(pairs, offsets)])
+    
+    rng = np.random.default_rng(seed)
+    result = minimize(
+        _fr_block_energy_and_grad,
+        rng.random((n, dim)).ravel(),
+        args=(n, dim, rows, cols, weights, pair_i, pair_j, k, block, sizes, gravity),
+        jac=True,
+        method="L-BFGS-B",
+        options={"maxiter": iterations}
+    )
+    
+    # コミュニティごとにスケールを揃え、中心座標へ平行移動する
+    X = result.x.reshape(n, dim)
+    pos = {}
+    for community_id, center in enumerate(centers):
+        start, end = offsets[community_id], offsets[community_id + 1]
+        coords = nx.rescale_layout(X[start:end], scale=scale) + np.asarray(center, dtype=float)
+        pos.update(zip(nodelist[start:end], coords))
+    return pos
+
+def _community_edge_weights(G, communities):
+    """
+    コミュニティ間のエッジ数を集計する
+    
+    ノード×コミュニティの所属行列Mを作り、M.T @ A @ M で一括して集計する。
+    SciPyがない場合は、各エッジを一度だけ走査して両端のコミュニティの組を数える。
+    
+    Args:
+        G (nx.Graph): 無向グラフ
+        communities (list): ノード集合のリスト
+        
+    Returns:
+        list: (コミュニティi, コミュニティj, エッジ数) のリスト（i < j）
+    """
+    nodelist = list(G)
+    node_index = {node: i for i, node in enumerate(nodelist)}
+    community_of = np.empty(len(nodelist), dtype=np.intp)
+    for community_id, members in enumerate(communities):
+        for node in members:
+            community_of[node_index[node]] = community_id
+    
+    try:
+        import scipy.sparse as sp
+    except ImportError:
+        edge_counts = Counter()
+        for u, v in G.edges():
+            ci, cj = community_of[node_index[u]], community_of[node_index[v]]
+            if ci != cj:
+                edge_counts[(min(ci, cj), max(ci, cj))] += 1
+        return [(int(i), int(j), float(w)) for (i, j), w in edge_counts.items()]
+    
+    A = nx.to_scipy_sparse_array(G, nodelist=nodelist, weight=None, format="csr")
+    M = sp.csr_array(
+        (np.ones(len(nodelist)), (np.arange(len(nodelist)), community_of)),
+        shape=(len(nodelist), len(communities))
+    )
+    C = (M.T @ A @ M).tocoo()
+    return [(int(i), int(j), float(w)) for i, j, w in zip(C.row, C.col, C.data) if i < j]
+
+def calculate_community_layout(G, scale=1, center=None, seed=None, community_scale=0.3):
+    """
+    コミュニティ構造に基づくレイアウトを計算する
+    
+    コミュニティを1ノードとみなしたグラフ（コミュニティ間のエッジ数を重みとする）を
+    配置した後、各コミュニティ内のノードをその位置の周りに配置する。
+    
+    Args:
+        G (nx.Graph): NetworkXグラフ
+        scale (float, optional): スケール
+        center (tuple, optional): 中心座標
+        seed (int, optional): 乱数シード
+        community_scale (float, optional): コミュニティ内の配置のスケール（scaleに対する比率）
+        
+    Returns:
+        dict: ノードIDをキー、位置を値とする辞書
+    """
+    try:
+        if G.number_of_nodes() == 0:
+            return {}
+        H = G.to_undirected() if G.is_directed() else G
+        communities = _detect_communities(H, seed=seed)
+        
+        community_graph = nx.Graph()
+        community_graph.add_nodes_from(range(len(communities)))
+        community_graph.add_weighted_edges_from(_community_edge_weights(H, communities))
+        
+        # コミュニティの配置
+        community_pos = calculate_spring_lbfgs_layout(community_graph, scale=scale, center=center, seed=seed)
+        
+        # 各コミュニティ内のノードの配置
+        # 小さいコミュニティは最適化の準備のオーバーヘッドが支配的なため、一度の最小化でまとめて配置する
+        small = [i for i, members in enumerate(communities) if len(members) <= BLOCK_LAYOUT_MAX_COMMUNITY_SIZE]
+        large = [i for i, members in enumerate(communities) if len(members) > BLOCK_LAYOUT_MAX_COMMUNITY_SIZE]
+        if len(small) == 1:
+            large += small
+            small = []
+        pos = {}
+        if small:
+            pos.update(_calculate_block_lbfgs_layout(
+                H,
+                [communities[i] for i in small],
+                [community_pos[i] for i in small],
+                scale=scale * community_scale,
+                seed=seed
+            ))
+        for community_id in large:
+            pos.update(calculate_spring_lbfgs_layout(
+                H.subgraph(communities[community_id]),
+                scale=scale * community_scale,
+                center=community_pos[community_id],
+                seed=seed
+            ))
+        return pos
+    except Exception as e:
+        logger.error(f"Error calculating community layout: {e}")
+        # フォールバック: スプリングレイアウト
+        return nx.spring_layout(G, scale=scale, center=center, seed=seed)
+
+# レイアウトタイプと計算関数の対応表（get_layout_functionの呼び出しごとに再構築しない）
+_LAYOUT_FUNCTIONS = {
+    "spring": calculate_spring_layout,
+    "circular": calculate_circular_layout,
+    "random": calculate_random_layout,
+    "spectral": calculate_spectral_layout,
+    "shell": calculate_shell_layout,
+    "kamada_kawai": calculate_kamada_kawai_layout,
+    "fruchterman_reingold": calculate_fruchterman_reingold_layout,
+    "spring_lbfgs": calculate_spring_lbfgs_layout,
+    "spring_numba": calculate_spring_numba_layout,
+    "spiral": calculate_spiral_layout,
+    "multipartite": calculate_multipartite_layout,
+    "bipartite": calculate_bipartite_layout,
+    "community": calculate_community_layout
+}
+
 def get_layout_function(layout_type):
     """
     レイアウトタイプに基づいてレイアウト計算関数を取得する
@@ -263,17 +692,4 @@ def get_layout_function(layout_type):
     Returns:
         function: レイアウト計算関数
     """
-    layout_functions = {
-        "spring": calculate_spring_layout,
-        "circular": calculate_circular_layout,
-        "random": calculate_random_layout,
-        "spectral": calculate_spectral_layout,
-        "shell": calculate_shell_layout,
-        "kamada_kawai": calculate_kamada_kawai_layout,
-        "fruchterman_reingold": calculate_fruchterman_reingold_layout,
-        "spiral": calculate_spiral_layout,
-        "multipartite": calculate_multipartite_layout,
-        "bipartite": calculate_bipartite_layout
-    }
-    
-    return layout_functions.get(layout_type, calculate_spring_layout)
+    return _LAYOUT_FUNCTIONS.get(layout_type, calculate_spring_layout)
@@ -8,20 +8,32 @@ GraphML形式のデータをサポートし、NetworkXを使用したグラフ
 """
 
 import os
+import asyncio
 import logging
 import networkx as nx
 import numpy as np
-from typing import Dict, Any, List, Optional, Union
-from fastapi import FastAPI, Depends, HTTPException, Body, Request, Header
-from fastapi.responses import JSONResponse
+from typing import Dict, Any, List, Optional, Tuple, Union
+from fastapi import FastAPI, Depends, HTTPException, Body, Request, Header, BackgroundTasks
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 import random
 import json
 import base64
 import io
+from contextlib import asynccontextmanager
 from datetime import datetime
 
+from tools.cache import LRUCache, graph_fingerprint
+from tools.network_tools import graph_to_graphml_string
+from layouts.layout_functions import calculate_spring_lbfgs_layout, calculate_community_layout
+from layouts.fr_numba import calculate_spring_numba_layout, warm_up as warm_up_spring_numba
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 # ロギングの設定
 log_level = os.environ.get("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
@@ -30,11 +42,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger("networkx_mcp")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """起動時にNumbaカーネルをコンパイルし、最初のレイアウトリクエストを待たせないようにする"""
+    warm_up_spring_numba()
+    yield
+
 # FastAPIアプリケーションの作成
 app = FastAPI(
     title="NetworkX MCP (Stateless)",
     description="Stateless MCP server for network analysis and visualization using NetworkX",
     version="0.2.0",
+    lifespan=lifespan,
 )
 
 # CORSミドルウェアの設定
@@ -75,8 +94,37 @@ class GraphMLExportParams(BaseModel):
 
 # --- ヘルパー関数 ---
 
+# 中心性の計算結果のキャッシュ（キー: (フィンガープリント, 中心性タイプ, パラメータ)）
+_CENTRALITY_CACHE = LRUCache(maxsize=128)
+
+# GraphMLのインポート・エクスポート結果のキャッシュ（キー: フィンガープリント）
+# いずれも入力のGraphMLのみで結果が決まるため、同じグラフの再送時は再計算しない
+_IMPORT_RESPONSE_CACHE = LRUCache(maxsize=64)
+_EXPORT_CONTENT_CACHE = LRUCache(maxsize=64)
+
+# パース済みグラフのキャッシュ（キー: フィンガープリント）
+# 同じグラフの再送時にパースを省略し、グラフに紐づくCSR隣接行列のキャッシュも再利用する。
+# リクエスト間で共有されるため、nx.freezeで構造の変更を禁止する
+_GRAPH_CACHE = LRUCache(maxsize=32)
+
+# サーバー内部で生成した結果を一括でJSONにシリアライズするためのアダプター
+_RESULT_ADAPTER = TypeAdapter(Dict[str, Any])
+
+def trusted_json_response(content: Dict[str, Any]) -> Response:
+    """
+    サーバー内部で生成した（検証済みの）結果をJSONレスポンスに変換する
+    
+    response_modelによる再検証とjsonable_encoderの走査を省略し、
+    pydantic-coreで一度にバイト列へシリアライズする
+    """
+    return Response(content=_RESULT_ADAPTER.dump_json(content), media_type="application/json")
+
 def parse_graphml_string(graphml_content: str) -> nx.Graph:
-    """GraphML文字列をパースしてNetworkXグラフを返す"""
+    """GraphML文字列をパースしてNetworkXグラフを返す（変更不可のグラフを返す）"""
+    cache_key = graph_fingerprint(graphml_content)
+    G = _GRAPH_CACHE.get(cache_key)
+    if G is not None:
+        return G
     try:
         # デバッグ情報を記録
         logger.debug(f"Parsing GraphML string (length: {len(graphml_content)})")
@@ -85,6 +133,8 @@ def parse_graphml_string(graphml_content: str) -> nx.Graph:
         G = nx.read_graphml(content_io)
         
         logger.debug(f"Successfully parsed GraphML with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges")
+        nx.freeze(G)
+        _GRAPH_CACHE.set(cache_key, G)
         return G
     except Exception as e:
         error_msg = str(e)
@@ -98,11 +148,14 @@ def parse_graphml_string(graphml_content: str) -> nx.Graph:
 
 def graph_to_cytoscape(G: nx.Graph, positions: Optional[Dict] = None) -> Dict[str, Any]:
     """NetworkXグラフをCytoscape.jsが期待するJSON形式に変換する"""
+    positions = positions or {}
     nodes = []
     for node, attrs in G.nodes(data=True):
-        node_data = {"data": {"id": str(node), "label": attrs.get("name", str(node)), **attrs}}
-        if positions and str(node) in positions:
-            node_data["position"] = positions[str(node)]
+        node_id = str(node)
+        node_data = {"data": {"id": node_id, "label": attrs.get("name", node_id), **attrs}}
+        position = positions.get(node_id)
+        if position is not None:
+            node_data["position"] = position
         nodes.append(node_data)
 
     edges = [
@@ -111,21 +164,93 @@ def graph_to_cytoscape(G: nx.Graph, positions: Optional[Dict] = None) -> Dict[st
     ]
     return {"nodes": nodes, "edges": edges}
 
+# レイアウトタイプと関数の対応表（リクエストごとに再構築しないようモジュールレベルで定義）
+# "spring"はFRエネルギーのL-BFGS最小化で計算する（大規模グラフや固定ノード指定時はnx.spring_layoutを使用）
+LAYOUT_FUNCTIONS = {
+    "spring": calculate_spring_lbfgs_layout,
+    "circular": nx.circular_layout,
+    "random": nx.random_layout,
+    "spectral": nx.spectral_layout,
+    "shell": nx.shell_layout,
+    "kamada_kawai": nx.kamada_kawai_layout,
+    "fruchterman_reingold": nx.fruchterman_reingold_layout,
+    "spring_lbfgs": calculate_spring_lbfgs_layout,
+    "spring_numba": calculate_spring_numba_layout,
+    "community": calculate_community_layout
+}
+
+# 乱数を使うレイアウト関数（シード未指定時は固定シードを渡し、結果を再現可能・キャッシュ可能にする）
+_SEEDED_LAYOUT_FUNCTIONS = frozenset([
+    nx.spring_layout,
+    nx.random_layout,
+    nx.fruchterman_reingold_layout,
+    calculate_spring_lbfgs_layout,
+    calculate_spring_numba_layout,
+    calculate_community_layout
+])
+LAYOUT_SEED = int(os.environ.get("LAYOUT_SEED", "42"))
+
+# レイアウト計算結果のキャッシュ（キー: (フィンガープリント, レイアウトタイプ, パラメータ)）
+# 値はノードIDのリストと(N, 2)の座標配列の組で保持し、ノードごとの配列オブジェクトを持たない
+_LAYOUT_CACHE = LRUCache(maxsize=64)
+
+def compute_layout(G: nx.Graph, layout_type: str, **kwargs) -> Dict:
+    """レイアウトアルゴリズムを適用し、NetworkXの位置辞書をそのまま返す"""
+    layout_func = LAYOUT_FUNCTIONS.get(layout_type, LAYOUT_FUNCTIONS["spring"])
+    if layout_func in _SEEDED_LAYOUT_FUNCTIONS and "seed" not in kwargs:
+        kwargs["seed"] = LAYOUT_SEED
+    return layout_func(G, **kwargs)
+
+def positions_to_arrays(positions: Dict) -> Tuple[List[str], np.ndarray]:
+    """
+    NetworkXの位置辞書をノードIDのリストと(N, 2)の座標配列に変換する
+    """
+    if not positions:
+        return [], np.empty((0, 2), dtype=np.float64)
+    ids = [str(node) for node in positions]
+    xy = np.array(list(positions.values()), dtype=np.float64)[:, :2].copy()
+    return ids, xy
+
+def compute_layout_cached(graphml_content: str, layout_type: str, layout_params: Dict[str, Any]) -> Tuple[List[str], np.ndarray]:
+    """
+    GraphML文字列に対するレイアウトを計算し、ノードIDのリストと座標配列を返す
+    
+    同じグラフ・レイアウトタイプ・パラメータの組み合わせはキャッシュから返し、
+    GraphMLのパースとレイアウト計算を省略する
+    """
+    cache_key = (
+        graph_fingerprint(graphml_content),
+        layout_type,
+        json.dumps(layout_params, sort_keys=True, default=str)
+    )
+    layout = _LAYOUT_CACHE.get(cache_key)
+    if layout is None:
+        G = parse_graphml_string(graphml_content)
+        layout = positions_to_arrays(compute_layout(G, layout_type, **layout_params))
+        # キャッシュした座標配列はリクエスト間で共有するため読み取り専用にする
+        layout[1].flags.writeable = False
+        _LAYOUT_CACHE.set(cache_key, layout)
+    else:
+        logger.debug(f"Returning cached {layout_type} layout")
+    return layout
+
+def layout_arrays_to_json(ids: List[str], xy: np.ndarray) -> Dict[str, Dict[str, float]]:
+    """
+    ノードIDのリストと座標配列をJSONシリアライズ可能な形式に変換する
+    
+    座標はノードごとのfloat変換ではなくtolistで一括してPythonのfloatに変換する
+    """
+    return {node_id: {"x": x, "y": y} for node_id, (x, y) in zip(ids, xy.tolist())}
+
+def positions_to_json(positions: Dict) -> Dict[str, Dict[str, float]]:
+    """NetworkXの位置辞書をJSONシリアライズ可能な形式に変換する"""
+    return layout_arrays_to_json(*positions_to_arrays(positions))
+
 def apply_layout(G: nx.Graph, layout_type: str, **kwargs) -> Dict:
     """レイアウトアルゴリズムを適用し、ノードの位置を返す"""
-    layout_functions = {
-        "spring": nx.spring_layout,
-        "circular": nx.circular_layout,
-        "random": nx.random_layout,
-        "spectral": nx.spectral_layout,
-        "shell": nx.shell_layout,
-        "kamada_kawai": nx.kamada_kawai_layout,
-        "fruchterman_reingold": nx.fruchterman_reingold_layout
-    }
-    layout_func = layout_functions.get(layout_type, nx.spring_layout)
-    positions = layout_func(G, **kwargs)
+    positions = compute_layout(G, layout_type, **kwargs)
     # JSONシリアライズ可能な形式に変換
-    return {str(k): {"x": float(v[0]), "y": float(v[1])} for k, v in positions.items()}
+    return positions_to_json(positions)
 
 # --- APIエンドポイント ---
 
@@ -133,20 +258,25 @@ def apply_layout(G: nx.Graph, layout_type: str, **kwargs) -> Dict:
 async def health_check():
     return {"status": "ok", "timestamp": datetime.now().isoformat()}
 
+# MCPサーバーの情報（内容は固定のため、起動時に一度だけJSONにシリアライズしておく）
+MCP_INFO = {
+    "success": True,
+    "name": "NetworkX MCP (Stateless)",
+    "version": "0.2.0",
+    "description": "Stateless NetworkX graph analysis and visualization MCP server",
+    "tools": [
+        {"name": "get_sample_network", "description": "Get a sample network in GraphML format"},
+        {"name": "change_layout", "description": "Change the layout algorithm for a given network"},
+        {"name": "calculate_centrality", "description": "Calculate centrality metrics for a given network"},
+        {"name": "get_network_info", "description": "Get basic statistics for a given network"}
+    ]
+}
+_MCP_INFO_BODY = _RESULT_ADAPTER.dump_json(MCP_INFO)
+
 @app.get("/info")
 async def get_mcp_info():
     """MCPサーバーの情報を返す"""
-    return {
-        "success": True,
-        "name": "NetworkX MCP (Stateless)",
-        "version": "0.2.0",
-        "description": "Stateless NetworkX graph analysis and visualization MCP server",
-        "tools": [
-            {"name": "get_sample_network", "description": "Get a sample network in GraphML format"},
-            {"name": "change_layout", "description": "Change the layout algorithm for a given network"},
-            {"name": "calculate_centrality", "description": "Calculate centrality metrics for a given network"}
-        ]
-    }
+    return Response(content=_MCP_INFO_BODY, media_type="application/json")
 
 @app.get("/get_sample_network", response_model=Dict[str, Any])
 async def get_sample_network():
@@ -156,75 +286,177 @@ async def get_sample_network():
         edge_probability = random.uniform(0.15, 0.25)
         G = nx.gnp_random_graph(num_nodes, edge_probability)
         
-        if not nx.is_connected(G):
-            components = list(nx.connected_components(G))
+        # 連結成分は一度だけ計算し、その数で連結性を判定する
+        components = list(nx.connected_components(G))
+        if len(components) > 1:
             largest_component = max(components, key=len)
-            for component in components:
-                if component != largest_component:
-                    node_from = random.choice(list(component))
-                    node_to = random.choice(list(largest_component))
-                    G.add_edge(node_from, node_to)
+            largest_nodes = list(largest_component)
+            G.add_edges_from(
+                (random.choice(list(component)), random.choice(largest_nodes))
+                for component in components
+                if component != largest_component
+            )
 
         # GraphMLとして出力
-        output = io.BytesIO()
-        nx.write_graphml(G, output)
-        output.seek(0)
-        graphml_content = output.read().decode("utf-8")
+        graphml_content = graph_to_graphml_string(G)
         
-        return {
+        return trusted_json_response({
             "success": True,
             "graphml_content": graphml_content
-        }
+        })
     except Exception as e:
         logger.error(f"Error creating sample network: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def layout_arrays_to_msgpack(layout_type: str, ids: List[Any], xy: np.ndarray) -> Response:
+    """
+    レイアウト結果をMessagePackのレスポンスに変換する
+    
+    座標はfloat32の生バイト列（ノード順に x0, y0, x1, y1, ...）として positions_bin に格納する。
+    クライアントは new Float32Array(positions_bin) の [i*2], [i*2+1] でノード ids[i] の座標を読む
+    """
+    content = msgpack.packb({
+        "result": {
+            "success": True,
+            "layout": layout_type,
+            "ids": ids,
+            "n": len(ids),
+            "positions_bin": np.ascontiguousarray(xy, dtype="<f4").tobytes()
+        }
+    }, use_bin_type=True)
+    return Response(content=content, media_type="application/x-msgpack")
+
 @app.post("/tools/change_layout", response_model=Dict[str, Any])
-async def api_change_layout(params: LayoutParams):
+async def api_change_layout(params: LayoutParams, format: str = "json"):
     """
     与えられたネットワークのレイアウトを計算し、ノードの位置を返す
+    
+    ?format=msgpack を指定すると、座標をfloat32のバイナリ配列としたMessagePackで返す
+    （msgpack未インストール時はJSONで返す）
     """
     try:
-        G = parse_graphml_string(params.graphml_content)
-        positions = apply_layout(G, params.layout_type, **params.layout_params)
-        return {
+        # CPU負荷の高いレイアウト計算はワーカースレッドで実行し、イベントループを塞がない
+        ids, xy = await asyncio.to_thread(
+            compute_layout_cached, params.graphml_content, params.layout_type, params.layout_params
+        )
+        if format == "msgpack" and msgpack is not None:
+            return layout_arrays_to_msgpack(params.layout_type, ids, xy)
+        positions = layout_arrays_to_json(ids, xy)
+        return trusted_json_response({
             "result": {
                 "success": True,
                 "layout": params.layout_type,
                 "positions": positions
             }
-        }
+        })
     except Exception as e:
         logger.error(f"Error changing layout: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# SSEで1イベントあたりに送るノード位置の数
+LAYOUT_STREAM_CHUNK_SIZE = 1024
+
+@app.post("/tools/change_layout_stream")
+async def api_change_layout_stream(params: LayoutParams):
+    """
+    レイアウトを計算し、ノードの位置をServer-Sent Eventsで分割して返す
+    
+    大規模グラフ向けのエンドポイント。各イベントは
+    {"offset": 開始位置, "ids": [ノードID...], "xy": [[x, y]...]} の形式で、
+    最後に "done" イベントを送信する。小規模グラフには /tools/change_layout を使用する。
+    """
+    try:
+        ids, xy = await asyncio.to_thread(
+            compute_layout_cached, params.graphml_content, params.layout_type, params.layout_params
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error changing layout: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def event_stream():
+        for offset in range(0, len(ids), LAYOUT_STREAM_CHUNK_SIZE):
+            end = offset + LAYOUT_STREAM_CHUNK_SIZE
+            chunk = {"offset": offset, "ids": ids[offset:end], "xy": xy[offset:end].tolist()}
+            yield b"data: " + _RESULT_ADAPTER.dump_json(chunk) + b"\n\n"
+        done = {"success": True, "layout": params.layout_type, "total": len(ids)}
+        yield b"event: done\ndata: " + _RESULT_ADAPTER.dump_json(done) + b"\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.post("/tools/calculate_centrality", response_model=Dict[str, Any])
 async def api_calculate_centrality(params: CentralityParams):
     """
     与えられたネットワークの中心性を計算し、各ノードの値を返す
     """
     try:
-        G = parse_graphml_string(params.graphml_content)
-        # network_toolsからインポートした関数を使用
-        from tools.network_tools import calculate_centrality as tools_calculate_centrality
-        result = tools_calculate_centrality(G, params.centrality_type, **params.centrality_params)
-        
-        if not result["success"]:
-            error_msg = result.get("error", "Unknown error during centrality calculation")
-            logger.error(f"API: Centrality calculation failed: {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
+        cache_key = (
+            graph_fingerprint(params.graphml_content),
+            params.centrality_type,
+            json.dumps(params.centrality_params, sort_keys=True, default=str)
+        )
+        result = _CENTRALITY_CACHE.get(cache_key)
+        if result is None:
+            # パースと中心性計算はワーカースレッドで実行し、イベントループを塞がない
+            G = await asyncio.to_thread(parse_graphml_string, params.graphml_content)
+            # network_toolsからインポートした関数を使用
+            from tools.network_tools import calculate_centrality as tools_calculate_centrality
+            result = await asyncio.to_thread(
+                tools_calculate_centrality, G, params.centrality_type, **params.centrality_params
+            )
+            
+            if not result["success"]:
+                error_msg = result.get("error", "Unknown error during centrality calculation")
+                logger.error(f"API: Centrality calculation failed: {error_msg}")
+                raise HTTPException(status_code=400, detail=error_msg)
+            
+            _CENTRALITY_CACHE.set(cache_key, result)
 
-        return {
+        return trusted_json_response({
             "result": {
                 "success": True,
                 "centrality_type": result["centrality_type"],
                 "centrality_values": result["centrality"]
             }
-        }
+        })
     except Exception as e:
         logger.error(f"Error calculating centrality: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/tools/get_network_info", response_model=Dict[str, Any])
+async def api_get_network_info(params: GraphData):
+    """
+    与えられたネットワークの基本情報（ノード数、密度、クラスタリング係数など）を返す
+    
+    変換時にバックグラウンドで計算済みの場合はキャッシュから返す
+    """
+    try:
+        from tools.network_tools import get_cached_network_info, get_network_info
+        
+        cache_key = graph_fingerprint(params.graphml_content)
+        info = get_cached_network_info(cache_key)
+        if info is None:
+            G = await asyncio.to_thread(parse_graphml_string, params.graphml_content)
+            info = await asyncio.to_thread(get_network_info, G, cache_key=cache_key)
+        
+        if "error" in info:
+            logger.error(f"API: Network info calculation failed: {info['error']}")
+            raise HTTPException(status_code=400, detail=info["error"])
+        
+        return trusted_json_response({
+            "result": {
+                "success": True,
+                **info
+            }
+        })
+    except HTTPException:
+        # 既に処理済みのHTTPExceptionはそのまま再スロー
+        raise
+    except Exception as e:
+        logger.error(f"Error getting network info: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/tools/import_graphml", response_model=Dict[str, Any])
 async def api_import_graphml(params: GraphMLImportParams):
     """
@@ -234,10 +466,17 @@ async def api_import_graphml(params: GraphMLImportParams):
         # デバッグ情報を記録
         logger.debug(f"API: Importing GraphML content (length: {len(params.graphml_content)})")
         
+        # 同じGraphMLのインポート結果はシリアライズ済みのレスポンスをそのまま返す
+        cache_key = graph_fingerprint(params.graphml_content)
+        body = _IMPORT_RESPONSE_CACHE.get(cache_key)
+        if body is not None:
+            logger.debug("API: Returning cached GraphML import result")
+            return Response(content=body, media_type="application/json")
+        
         # 名前の衝突を避けるため、tools.network_toolsモジュールから関数をインポートする際に
         # 別名を使用する
         from tools.network_tools import parse_graphml_string as tools_parse_graphml_string
-        result = tools_parse_graphml_string(params.graphml_content)
+        result = await asyncio.to_thread(tools_parse_graphml_string, params.graphml_content)
         
         if not result["success"]:
             error_msg = result.get("error", "Unknown error during GraphML import")
@@ -245,13 +484,15 @@ async def api_import_graphml(params: GraphMLImportParams):
             raise HTTPException(status_code=400, detail=error_msg)
         
         logger.debug(f"API: GraphML import successful with {len(result['nodes'])} nodes and {len(result['edges'])} edges")
-        return {
+        body = _RESULT_ADAPTER.dump_json({
             "result": {
                 "success": True,
                 "nodes": result["nodes"],
                 "edges": result["edges"]
             }
-        }
+        })
+        _IMPORT_RESPONSE_CACHE.set(cache_key, body)
+        return Response(content=body, media_type="application/json")
     except HTTPException:
         # 既に処理済みのHTTPExceptionはそのまま再スロー
         raise
@@ -261,9 +502,12 @@ async def api_import_graphml(params: GraphMLImportParams):
         raise HTTPException(status_code=500, detail=error_msg)
 
 @app.post("/tools/convert_graphml", response_model=Dict[str, Any])
-async def api_convert_graphml(params: GraphMLConvertParams):
+async def api_convert_graphml(params: GraphMLConvertParams, background_tasks: BackgroundTasks):
     """
     GraphMLを標準形式に変換する
+    
+    変換後のグラフのネットワーク情報はレスポンス返却後にバックグラウンドで計算し、
+    キャッシュしておく
     """
     try:
         # デバッグ情報を記録
@@ -272,7 +516,7 @@ async def api_convert_graphml(params: GraphMLConvertParams):
         # 名前の衝突を避けるため、tools.network_toolsモジュールから関数をインポートする際に
         # 別名を使用する
         from tools.network_tools import convert_to_standard_graphml as tools_convert_to_standard_graphml
-        result = tools_convert_to_standard_graphml(params.graphml_content)
+        result = await asyncio.to_thread(tools_convert_to_standard_graphml, params.graphml_content)
         
         if not result["success"]:
             error_msg = result.get("error", "Unknown error during GraphML conversion")
@@ -280,6 +524,15 @@ async def api_convert_graphml(params: GraphMLConvertParams):
             raise HTTPException(status_code=400, detail=error_msg)
         
         logger.debug("API: GraphML conversion successful")
+        
+        # 変換後のGraphMLに対するネットワーク情報を事前計算
+        from tools.network_tools import refresh_network_info
+        background_tasks.add_task(
+            refresh_network_info,
+            result["graph"],
+            graph_fingerprint(result["graphml_content"])
+        )
+        
         return {
             "success": True,
             "graphml_content": result["graphml_content"]
@@ -301,28 +554,36 @@ async def api_export_graphml(params: GraphMLExportParams):
         # デバッグ情報を記録
         logger.debug(f"API: Exporting GraphML content (length: {len(params.graphml_content)})")
         
-        try:
-            G = parse_graphml_string(params.graphml_content)
-        except HTTPException as parse_error:
-            logger.error(f"API: GraphML parse error during export: {parse_error.detail}")
-            raise
-        
-        from tools.network_tools import export_network_as_graphml
-        result = export_network_as_graphml(G, None, None)
-        
-        if not result["success"]:
-            error_msg = result.get("error", "Unknown error during GraphML export")
-            logger.error(f"API: GraphML export failed: {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
+        cache_key = graph_fingerprint(params.graphml_content)
+        content = _EXPORT_CONTENT_CACHE.get(cache_key)
+        if content is None:
+            try:
+                G = await asyncio.to_thread(parse_graphml_string, params.graphml_content)
+            except HTTPException as parse_error:
+                logger.error(f"API: GraphML parse error during export: {parse_error.detail}")
+                raise
+            
+            from tools.network_tools import export_network_as_graphml
+            result = await asyncio.to_thread(export_network_as_graphml, G, None, None)
+            
+            if not result["success"]:
+                error_msg = result.get("error", "Unknown error during GraphML export")
+                logger.error(f"API: GraphML export failed: {error_msg}")
+                raise HTTPException(status_code=400, detail=error_msg)
+            
+            content = result["content"]
+            _EXPORT_CONTENT_CACHE.set(cache_key, content)
+            logger.debug(f"API: GraphML export successful")
+        else:
+            logger.debug("API: Returning cached GraphML export result")
         
-        logger.debug(f"API: GraphML export successful")
-        return {
+        return trusted_json_response({
             "result": {
                 "success": True,
                 "format": "graphml",
-                "content": result["content"]
+                "content": content
             }
-        }
+        })
     except HTTPException:
         # 既に処理済みのHTTPExceptionはそのまま再スロー
         raise
@@ -333,4 +594,4 @@ async def api_export_graphml(params: GraphMLExportParams):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    uvicorn.run(app, host="0.0.0.0", port=8001, timeout_keep_alive=75)
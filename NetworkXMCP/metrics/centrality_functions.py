@@ -209,6 +209,20 @@ def calculate_communicability_betweenness_centrality(G, normalized=True):
         logger.error(f"Error calculating communicability betweenness centrality: {e}")
         return {}
 
+# 中心性タイプと計算関数の対応表（get_centrality_functionの呼び出しごとに再構築しない）
+_CENTRALITY_FUNCTIONS = {
+    "degree": calculate_degree_centrality,
+    "closeness": calculate_closeness_centrality,
+    "betweenness": calculate_betweenness_centrality,
+    "eigenvector": calculate_eigenvector_centrality,
+    "pagerank": calculate_pagerank,
+    "katz": calculate_katz_centrality,
+    "load": calculate_load_centrality,
+    "harmonic": calculate_harmonic_centrality,
+    "subgraph": calculate_subgraph_centrality,
+    "communicability_betweenness": calculate_communicability_betweenness_centrality
+}
+
 def get_centrality_function(centrality_type):
     """
     中心性タイプに基づいて中心性計算関数を取得する
@@ -219,17 +233,4 @@ def get_centrality_function(centrality_type):
     Returns:
         function: 中心性計算関数
     """
-    centrality_functions = {
-        "degree": calculate_degree_centrality,
-        "closeness": calculate_closeness_centrality,
-        "betweenness": calculate_betweenness_centrality,
-        "eigenvector": calculate_eigenvector_centrality,
-        "pagerank": calculate_pagerank,
-        "katz": calculate_katz_centrality,
-        "load": calculate_load_centrality,
-        "harmonic": calculate_harmonic_centrality,
-        "subgraph": calculate_subgraph_centrality,
-        "communicability_betweenness": calculate_communicability_betweenness_centrality
-    }
-    
-    return centrality_functions.get(centrality_type, calculate_degree_centrality)
+    return _CENTRALITY_FUNCTIONS.get(centrality_type, calculate_degree_centrality)
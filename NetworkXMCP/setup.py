@@ -6,7 +6,7 @@ setup(
     packages=find_packages(),
     install_requires=[
         "fastapi>=0.103.1",
-        "uvicorn>=0.23.2",
+        "uvicorn[standard]>=0.23.2",
         "networkx>=3.1",
         "numpy>=1.25.2",
         "matplotlib>=3.7.2",
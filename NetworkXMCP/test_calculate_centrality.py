@@ -0,0 +1,26 @@
+"""
+calculate_centrality関数の近似用パラメータ（approximate, k）のテスト
+"""
+
+import networkx as nx
+import pytest
+
+from tools.network_tools import calculate_centrality
+
+@pytest.mark.parametrize("centrality_type", ["degree", "pagerank", "eigenvector"])
+@pytest.mark.parametrize("params", [{"k": 5}, {"approximate": True}, {"approximate": False, "k": 5}])
+def test_approximation_params_are_ignored_for_other_types(centrality_type, params):
+    """近似計算のない中心性では、approximateとkを無視して通常どおり計算する"""
+    G = nx.karate_club_graph()
+    expected = calculate_centrality(G, centrality_type)
+    result = calculate_centrality(G, centrality_type, **params)
+    assert result["success"], result.get("error")
+    assert result["centrality"] == pytest.approx(expected["centrality"])
+
+@pytest.mark.parametrize("centrality_type", ["closeness", "betweenness"])
+def test_explicit_k_selects_approximation(centrality_type):
+    """媒介中心性・近接中心性では、kのみの指定でも近似計算になる"""
+    G = nx.karate_club_graph()
+    result = calculate_centrality(G, centrality_type, k=5)
+    assert result["success"], result.get("error")
+    assert len(result["centrality"]) == G.number_of_nodes()
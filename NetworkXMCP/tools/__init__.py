@@ -7,17 +7,26 @@ NetworkXを使用したグラフの操作ツールを提供するモジュール
 
 from .network_tools import (
     create_random_network,
+    graph_to_graphml_string,
     parse_graphml_string,
     convert_to_standard_graphml,
     export_network_as_graphml,
-    get_network_info
+    get_network_info,
+    get_cached_network_info,
+    refresh_network_info
 )
+from .cache import graph_fingerprint, LRUCache
 
 
 __all__ = [
     'create_random_network',
+    'graph_to_graphml_string',
     'parse_graphml_string',
     'convert_to_standard_graphml',
     'export_network_as_graphml',
-    'get_network_info'
+    'get_network_info',
+    'get_cached_network_info',
+    'refresh_network_info',
+    'graph_fingerprint',
+    'LRUCache'
 ]
@@ -0,0 +1,62 @@
+"""
+グラフ結果キャッシュモジュール
+===================
+
+ステートレスなMCPサーバーでは毎回GraphML文字列が送られてくるため、
+その内容から計算したフィンガープリントをキーとして計算結果をキャッシュします。
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def graph_fingerprint(graphml_content):
+    """
+    GraphML文字列からグラフのフィンガープリントを計算する
+
+    Args:
+        graphml_content (str): GraphML文字列
+
+    Returns:
+        str: フィンガープリント（16進文字列）
+    """
+    return hashlib.blake2b(graphml_content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class LRUCache:
+    """
+    スレッドセーフなLRUキャッシュ
+
+    バックグラウンドタスク（スレッドプール）とリクエスト処理の両方から
+    アクセスされるため、ロックで保護する。
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """キーに対応する値を返す。存在しない場合はNoneを返す"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """値を格納し、上限を超えた場合は最も古いエントリを削除する"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """すべてのエントリを削除する"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
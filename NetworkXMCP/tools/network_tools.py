@@ -5,16 +5,214 @@
 NetworkXを使用したグラフの操作ツールを提供します。
 """
 
+import os
+import math
+import re
 import networkx as nx
 import numpy as np
 import logging
 import io
 import random
+import weakref
 from typing import Dict, List, Any, Optional, Union
 
+from .cache import LRUCache
+
+try:
+    from joblib import Parallel, delayed
+except ImportError:
+    Parallel = None
+
 # ロギングの設定
 logger = logging.getLogger("networkx_mcp.tools.network")
 
+# fix_graphml_structureで使用する正規表現（モジュール読み込み時に一度だけコンパイル）
+# XMLで使用できない制御文字のパターン
+_ILLEGAL_XML_CHARS_RE = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+# ASCIIのみの文字列ではstr.translateで削除する方が正規表現より高速なため、同じ文字集合の削除テーブルも用意する
+_ILLEGAL_XML_CHARS_TABLE = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+# 中身が空のdata要素（<data key="xxx"></data>）のパターン
+_EMPTY_DATA_ELEMENT_RE = re.compile(r'<data key="([^"]+)"></data>')
+
+# convert_to_standard_graphmlで補完する標準ノード属性
+# （属性名, 代替属性名の候補（優先順）, 代替属性がない場合のデフォルト値を返す関数）の順に処理する
+_STANDARD_NODE_ATTRIBUTES = (
+    ("name", ("label", "id", "title", "node_name", "node_label"),
+     lambda node: f"Node {node}"),
+    ("color", ("colour", "node_color", "fill_color", "fill", "rgb", "hex"),
+     lambda node: "#1d4ed8"),
+    ("size", ("node_size", "width", "radius", "scale"),
+     lambda node: "5.0"),
+    ("description", ("desc", "note", "info", "detail", "tooltip"),
+     lambda node: f"Node {node}"),
+    ("x", ("pos_x", "position_x", "coord_x", "coordinate_x"),
+     lambda node: str(random.uniform(-1.0, 1.0))),
+    ("y", ("pos_y", "position_y", "coord_y", "coordinate_y"),
+     lambda node: str(random.uniform(-1.0, 1.0))),
+)
+
+# ネットワーク情報のキャッシュ（キー: GraphMLのフィンガープリント）
+_NETWORK_INFO_CACHE = LRUCache(maxsize=256)
+
+# parse_graphml_stringで個別に処理するため、追加属性としてはコピーしない属性名
+_NODE_RESERVED_KEYS = frozenset(["id", "label", "x", "y", "size", "color"])
+_EDGE_RESERVED_KEYS = frozenset(["source", "target", "width", "color"])
+
+# 生成したネットワークの初期配置をスプリングレイアウトで計算するノード数の上限
+INITIAL_SPRING_LAYOUT_MAX_NODES = int(os.environ.get("INITIAL_SPRING_LAYOUT_MAX_NODES", "500"))
+
+# 媒介中心性をデフォルトでサンプリング近似に切り替えるノード数の閾値
+BETWEENNESS_APPROX_THRESHOLD = int(os.environ.get("BETWEENNESS_APPROX_THRESHOLD", "2000"))
+# 厳密な媒介中心性をjoblibで並列計算するノード数の閾値
+BETWEENNESS_PARALLEL_THRESHOLD = int(os.environ.get("BETWEENNESS_PARALLEL_THRESHOLD", "500"))
+# 近接中心性をサンプリング近似に切り替えるノード数の閾値
+CLOSENESS_APPROX_THRESHOLD = int(os.environ.get("CLOSENESS_APPROX_THRESHOLD", "5000"))
+
+# igraphバックエンドの設定（大規模グラフ向けのオプション機能）
+USE_IGRAPH = os.environ.get("USE_IGRAPH", "false").lower() in ("1", "true", "yes")
+IGRAPH_NODE_THRESHOLD = int(os.environ.get("IGRAPH_NODE_THRESHOLD", "5000"))
+
+_IG = None
+if USE_IGRAPH:
+    try:
+        import igraph as _ig
+        _IG = _ig
+    except ImportError:
+        logger.warning("USE_IGRAPH is enabled but python-igraph is not installed. Falling back to NetworkX.")
+
+# NetworkXグラフ -> (igraphグラフ, ノードリスト) の変換結果
+_IGRAPH_CACHE = weakref.WeakKeyDictionary()
+
+def _use_igraph(G):
+    """igraphバックエンドで計算すべきグラフかどうかを判定する"""
+    return _IG is not None and G.number_of_nodes() > IGRAPH_NODE_THRESHOLD
+
+def _to_igraph(G):
+    """
+    NetworkXグラフをigraphグラフに変換する
+
+    Args:
+        G (nx.Graph): NetworkXグラフ
+
+    Returns:
+        tuple: (igraphグラフ, igraphの頂点順に並んだNetworkXノードのリスト)
+    """
+    cached = _IGRAPH_CACHE.get(G)
+    if cached is not None and cached[0].ecount() == G.number_of_edges():
+        return cached
+    
+    nodelist = list(G.nodes())
+    node_index = {node: i for i, node in enumerate(nodelist)}
+    edges = [(node_index[u], node_index[v]) for u, v in G.edges()]
+    g_ig = _IG.Graph(n=len(nodelist), edges=edges, directed=G.is_directed())
+    _IGRAPH_CACHE[G] = (g_ig, nodelist)
+    return g_ig, nodelist
+
+# NetworkXグラフ -> {重み属性名: (CSR隣接行列, ノードリスト)} の変換結果
+_CSR_CACHE = weakref.WeakKeyDictionary()
+
+def graph_to_csr(G, weight=None):
+    """
+    NetworkXグラフをCSR形式の隣接行列に変換する
+
+    同じグラフ（パース済みグラフのキャッシュなど）に対する変換結果はキャッシュし、
+    中心性計算やレイアウトで辞書構造を毎回走査しないようにする。
+
+    Args:
+        G (nx.Graph): NetworkXグラフ
+        weight (str, optional): エッジの重みの属性名（Noneの場合は1）
+
+    Returns:
+        tuple: (CSR隣接行列, 行・列の順に並んだノードのリスト)
+    """
+    by_weight = _CSR_CACHE.get(G)
+    if by_weight is None:
+        by_weight = _CSR_CACHE[G] = {}
+    cached = by_weight.get(weight)
+    if cached is not None and cached[0].shape[0] == G.number_of_nodes():
+        return cached
+    
+    nodelist = list(G)
+    A = nx.to_scipy_sparse_array(G, nodelist=nodelist, weight=weight, dtype=np.float64, format="csr")
+    by_weight[weight] = (A, nodelist)
+    return A, nodelist
+
+def _csr_degree(G):
+    """CSR隣接行列の行・列の和から次数中心性を計算する（nx.degree_centralityと同じ結果）"""
+    n = G.number_of_nodes()
+    if n <= 1:
+        return {node: 1.0 for node in G}
+    A, nodelist = graph_to_csr(G)
+    # 有向グラフは入次数+出次数、無向グラフは自己ループを2回数える（NetworkXの次数と同じ定義）
+    degree = np.asarray(A.sum(axis=1)).ravel()
+    degree += np.asarray(A.sum(axis=0)).ravel() if G.is_directed() else A.diagonal()
+    return dict(zip(nodelist, (degree / (n - 1)).tolist()))
+
+def _csr_eigenvector(G, weight=None, max_iter=1000, tol=0):
+    """CSR隣接行列から固有ベクトル中心性を計算する（nx.eigenvector_centrality_numpyと同じ結果）"""
+    from scipy.sparse.csgraph import connected_components
+    from scipy.sparse.linalg import eigs
+    
+    if G.number_of_nodes() == 0:
+        raise nx.NetworkXPointlessConcept("cannot compute centrality for the null graph")
+    A, nodelist = graph_to_csr(G, weight)
+    # 非連結グラフでは解が一意に定まらないため、NetworkXと同様にエラーとする
+    num_components, _ = connected_components(A, directed=G.is_directed(), connection="strong")
+    if num_components > 1:
+        raise nx.AmbiguousSolution("eigenvector centrality does not give consistent results for disconnected graphs")
+    _, eigenvector = eigs(A.T, k=1, which="LR", maxiter=max_iter, tol=tol)
+    largest = eigenvector.flatten().real
+    norm = np.sign(largest.sum()) * np.linalg.norm(largest)
+    return dict(zip(nodelist, (largest / norm).tolist()))
+
+def _csr_pagerank(G, alpha=0.85, max_iter=100, tol=1.0e-6, weight="weight"):
+    """CSR隣接行列に対するべき乗法でPageRankを計算する（nx.pagerankと同じ結果）"""
+    import scipy.sparse as sp
+    
+    n = G.number_of_nodes()
+    if n == 0:
+        return {}
+    A, nodelist = graph_to_csr(G, weight)
+    # 行和で正規化した遷移行列（出次数0のノードは一様に遷移）
+    out_degree = np.asarray(A.sum(axis=1)).ravel()
+    inv_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=out_degree != 0)
+    P = sp.diags_array(inv_degree) @ A
+    dangling = out_degree == 0
+    
+    x = np.full(n, 1.0 / n)
+    teleport = (1.0 - alpha) / n
+    for _ in range(max_iter):
+        x_last = x
+        x = alpha * (x @ P + x[dangling].sum() / n) + teleport
+        if np.abs(x - x_last).sum() < n * tol:
+            return dict(zip(nodelist, x.tolist()))
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+# CSR隣接行列で計算する中心性と、その関数が受け付ける引数
+_CSR_CENTRALITY = {
+    "degree": (_csr_degree, frozenset()),
+    "eigenvector": (_csr_eigenvector, frozenset(["weight", "max_iter", "tol"])),
+    "pagerank": (_csr_pagerank, frozenset(["alpha", "max_iter", "tol", "weight"]))
+}
+
+# nx.write_graphmlが出力するXML宣言（generate_graphmlは宣言を出力しない）
+_GRAPHML_XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+
+def graph_to_graphml_string(G):
+    """
+    NetworkXグラフをGraphML文字列に変換する
+
+    BytesIOに書き込んでからデコードせず、nx.generate_graphmlの行を直接連結する。
+    出力はnx.write_graphmlと同じ。
+
+    Args:
+        G (nx.Graph): NetworkXグラフ
+
+    Returns:
+        str: GraphML文字列
+    """
+    return _GRAPHML_XML_DECLARATION + "\n".join(nx.generate_graphml(G)) + "\n"
+
 def create_random_network(num_nodes=20, edge_probability=0.2, seed=None):
     """
     ランダムネットワークを作成する
@@ -37,21 +235,31 @@ def create_random_network(num_nodes=20, edge_probability=0.2, seed=None):
         G = nx.gnp_random_graph(num_nodes, edge_probability, seed=seed)
         
         # 連結グラフを確保（孤立ノードがないようにする）
-        if not nx.is_connected(G):
-            # 連結成分を取得
-            components = list(nx.connected_components(G))
+        # 連結成分を取得（一度の走査で連結性の判定も兼ねる）
+        components = list(nx.connected_components(G))
+        if len(components) > 1:
             # 最大の連結成分以外の各成分から、最大成分へエッジを追加
             largest_component = max(components, key=len)
-            for component in components:
-                if component != largest_component:
-                    # 各成分から最大成分へのエッジを追加
-                    node_from = random.choice(list(component))
-                    node_to = random.choice(list(largest_component))
-                    G.add_edge(node_from, node_to)
-        
-        # ノードとエッジの情報を抽出
+            largest_nodes = list(largest_component)
+            # 各成分から最大成分へのエッジをまとめて追加
+            G.add_edges_from(
+                (random.choice(list(component)), random.choice(largest_nodes))
+                for component in components
+                if component != largest_component
+            )
+        
+        # 初期配置（大規模グラフでは力学モデルの計算を省き、O(N)の円形レイアウトにする。
+        # 見た目のレイアウトはchange_layoutで必要になった時点で計算する）
+        if G.number_of_nodes() > INITIAL_SPRING_LAYOUT_MAX_NODES:
+            pos = nx.circular_layout(G)
+        else:
+            pos = nx.spring_layout(G)
+        
+        # ノードとエッジの情報を抽出（座標は一つの配列にまとめ、tolistで一括してfloatに変換する）
+        nodelist = list(G)
+        xy = np.asarray([pos[node] for node in nodelist], dtype=np.float64)[:, :2].tolist()
         nodes = []
-        for node in G.nodes():
+        for node, (x, y) in zip(nodelist, xy):
             # ノードごとに少し異なるサイズと色の変化をつける
             size_variation = random.uniform(4.5, 5.5)
             color_variation = random.randint(-15, 15)
@@ -66,27 +274,15 @@ def create_random_network(num_nodes=20, edge_probability=0.2, seed=None):
                 "id": str(node),
                 "label": f"Node {node}",
                 "size": size_variation,
-                "color": f"rgb({r}, {g}, {b})"
+                "color": f"rgb({r}, {g}, {b})",
+                "x": x,
+                "y": y
             })
         
-        edges = []
-        for edge in G.edges():
-            edges.append({
-                "source": str(edge[0]),
-                "target": str(edge[1]),
-                "width": 1,
-                "color": "#94a3b8"
-            })
-        
-        # スプリングレイアウトを適用
-        pos = nx.spring_layout(G)
-        
-        # ノードの位置情報を追加
-        for node in nodes:
-            node_id = int(node["id"])
-            if node_id in pos:
-                node["x"] = float(pos[node_id][0])
-                node["y"] = float(pos[node_id][1])
+        edges = [
+            {"source": str(u), "target": str(v), "width": 1, "color": "#94a3b8"}
+            for u, v in G.edges()
+        ]
         
         return G, nodes, edges
     except Exception as e:
@@ -140,7 +336,7 @@ def parse_graphml_string(graphml_content):
             
             # Add any additional node attributes
             for key, value in attrs.items():
-                if key not in ["id", "label", "x", "y", "size", "color"]:
+                if key not in _NODE_RESERVED_KEYS:
                     node_data[key] = value
             
             nodes.append(node_data)
@@ -169,7 +365,7 @@ def parse_graphml_string(graphml_content):
             
             # Add any additional edge attributes
             for key, value in attrs.items():
-                if key not in ["source", "target", "width", "color"]:
+                if key not in _EDGE_RESERVED_KEYS:
                     edge_data[key] = value
             
             edges.append(edge_data)
@@ -202,13 +398,32 @@ def fix_graphml_structure(graphml_content):
     
     # 全体的な修正作業をトライ
     try:
+        # 不正なXML文字を削除
+        # （以降の部分文字列の判定結果に影響するため最初に行う）
+        if graphml_content.isascii():
+            # ASCIIのみの場合はC実装の文字削除で一度に処理する
+            cleaned = graphml_content.translate(_ILLEGAL_XML_CHARS_TABLE)
+            if len(cleaned) != len(graphml_content):
+                logger.debug("Removing illegal XML characters")
+                graphml_content = cleaned
+        elif _ILLEGAL_XML_CHARS_RE.search(graphml_content):
+            # 日本語などを含む場合は正規表現の方が高速
+            logger.debug("Removing illegal XML characters")
+            graphml_content = _ILLEGAL_XML_CHARS_RE.sub('', graphml_content)
+        
+        # 複数の修正で参照するタグの有無は一度だけ走査して判定する
+        # （以降の修正はこれらのタグを削除しないため、追加した場合のみフラグを更新する）
+        has_graphml = "<graphml" in graphml_content
+        has_graph = "<graph" in graphml_content
+        has_graphml_close = "</graphml>" in graphml_content
+        
         # XMLヘッダーが欠けている場合は追加
         if "<?xml" not in graphml_content:
             logger.debug("Adding XML header")
             graphml_content = '<?xml version="1.0" encoding="UTF-8"?>\n' + graphml_content
         
         # 名前空間宣言が欠けている場合は追加
-        if "<graphml" in graphml_content and "xmlns=" not in graphml_content:
+        if has_graphml and "xmlns=" not in graphml_content:
             logger.debug("Adding namespace declarations")
             graphml_content = graphml_content.replace(
                 "<graphml", 
@@ -216,32 +431,24 @@ def fix_graphml_structure(graphml_content):
             )
         
         # <graph>要素にedgedefault属性が欠けている場合は追加
-        if "<graph" in graphml_content and "edgedefault=" not in graphml_content:
+        if has_graph and "edgedefault=" not in graphml_content:
             logger.debug("Adding edgedefault attribute to graph element")
             graphml_content = graphml_content.replace(
                 "<graph", 
                 '<graph edgedefault="undirected"'
             )
         
-        # 不正なXML文字を削除
-        import re
-        # XMLの不正な文字を削除するパターン
-        # XMLで使用できない文字のパターン
-        illegal_xml_chars = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
-        if illegal_xml_chars.search(graphml_content):
-            logger.debug("Removing illegal XML characters")
-            graphml_content = illegal_xml_chars.sub('', graphml_content)
-        
         # XMLの閉じタグが不完全な場合の修正を試みる
         # graphmlタグの確認
-        if "<graphml" in graphml_content and "</graphml>" not in graphml_content:
+        if has_graphml and not has_graphml_close:
             logger.debug("Adding missing </graphml> tag")
             graphml_content += "\n</graphml>"
+            has_graphml_close = True
         
         # graphタグの確認
-        if "<graph" in graphml_content and "</graph>" not in graphml_content:
+        if has_graph and "</graph>" not in graphml_content:
             # </graphml>の前に</graph>を挿入
-            if "</graphml>" in graphml_content:
+            if has_graphml_close:
                 logger.debug("Adding missing </graph> tag before </graphml>")
                 graphml_content = graphml_content.replace("</graphml>", "</graph>\n</graphml>")
             else:
@@ -249,10 +456,11 @@ def fix_graphml_structure(graphml_content):
                 graphml_content += "\n</graph>"
         
         # データノードの修正 - 自己閉じタグに変換
-        if "<data " in graphml_content and "</data>" not in graphml_content:
+        # 空のdata要素に必ず含まれるリテラルで事前に絞り込み、該当しない場合は正規表現の走査を省略する
+        if '"></data>' in graphml_content:
             logger.debug("Fixing data elements to self-closing tags if needed")
             # <data key="xxx"></data> -> <data key="xxx"/>
-            graphml_content = re.sub(r'<data key="([^"]+)"></data>', r'<data key="\1"/>', graphml_content)
+            graphml_content = _EMPTY_DATA_ELEMENT_RE.sub(r'<data key="\1"/>', graphml_content)
     except Exception as e:
         logger.error(f"Error while fixing GraphML structure: {e}")
         # エラーが発生しても元のコンテンツを返す
@@ -331,106 +539,22 @@ def convert_to_standard_graphml(graphml_content):
                     "error": f"Failed to parse GraphML: {error_details}"
                 }
         
-        # 既存の属性を確認し、標準属性名へのマッピングを検出
-        attribute_mapping = {
-            'name': ['name', 'label', 'id', 'title', 'node_name', 'node_label'],
-            'color': ['color', 'colour', 'node_color', 'fill_color', 'fill', 'rgb', 'hex'],
-            'size': ['size', 'node_size', 'width', 'radius', 'scale'],
-            'description': ['description', 'desc', 'note', 'info', 'detail', 'tooltip']
-        }
-        
         # 各ノードに標準属性を追加
         logger.debug("Adding standard attributes to nodes")
-        for node in G.nodes():
-            node_str = str(node)
-            node_attrs = G.nodes[node]
-            
-            # 名前属性の処理
-            if 'name' not in node_attrs:
-                # 代替属性を探す
-                for alt_attr in attribute_mapping['name']:
-                    if alt_attr in node_attrs and alt_attr != 'name':
-                        node_attrs['name'] = str(node_attrs[alt_attr])
-                        break
-                else:
-                    # 代替属性が見つからない場合はノードIDを使用
-                    node_attrs['name'] = f"Node {node_str}"
-            else:
-                # 既存の属性を文字列に変換
-                node_attrs['name'] = str(node_attrs['name'])
-            
-            # 色属性の処理
-            if 'color' not in node_attrs:
+        for node, node_attrs in G.nodes(data=True):
+            for attr_name, alt_attrs, default in _STANDARD_NODE_ATTRIBUTES:
+                if attr_name in node_attrs:
+                    # 既存の属性を文字列に変換
+                    node_attrs[attr_name] = str(node_attrs[attr_name])
+                    continue
                 # 代替属性を探す
-                for alt_attr in attribute_mapping['color']:
-                    if alt_attr in node_attrs and alt_attr != 'color':
-                        node_attrs['color'] = str(node_attrs[alt_attr])
-                        break
-                else:
-                    # 代替属性が見つからない場合はデフォルト色を使用
-                    node_attrs['color'] = "#1d4ed8"  # Default color
-            else:
-                # 既存の属性を文字列に変換
-                node_attrs['color'] = str(node_attrs['color'])
-            
-            # サイズ属性の処理
-            if 'size' not in node_attrs:
-                # 代替属性を探す
-                for alt_attr in attribute_mapping['size']:
-                    if alt_attr in node_attrs and alt_attr != 'size':
-                        node_attrs['size'] = str(node_attrs[alt_attr])
-                        break
-                else:
-                    # 代替属性が見つからない場合はデフォルトサイズを使用
-                    node_attrs['size'] = "5.0"  # Default size
-            else:
-                # 既存の属性を文字列に変換
-                node_attrs['size'] = str(node_attrs['size'])
-            
-            # 説明属性の処理
-            if 'description' not in node_attrs:
-                # 代替属性を探す
-                for alt_attr in attribute_mapping['description']:
-                    if alt_attr in node_attrs and alt_attr != 'description':
-                        node_attrs['description'] = str(node_attrs[alt_attr])
-                        break
-                else:
-                    # 代替属性が見つからない場合はデフォルト説明を使用
-                    node_attrs['description'] = f"Node {node_str}"
-            else:
-                # 既存の属性を文字列に変換
-                node_attrs['description'] = str(node_attrs['description'])
-                
-            # 位置情報（x, y座標）の処理
-            # x座標の処理
-            if 'x' not in node_attrs:
-                # 代替属性を探す
-                for alt_attr in ['x', 'pos_x', 'position_x', 'coord_x', 'coordinate_x']:
-                    if alt_attr in node_attrs:
-                        node_attrs['x'] = str(node_attrs[alt_attr])
-                        break
-                else:
-                    # 代替属性が見つからない場合はランダムな位置を生成
-                    import random
-                    node_attrs['x'] = str(random.uniform(-1.0, 1.0))
-            else:
-                # 既存の属性を文字列に変換
-                node_attrs['x'] = str(node_attrs['x'])
-                
-            # y座標の処理
-            if 'y' not in node_attrs:
-                # 代替属性を探す
-                for alt_attr in ['y', 'pos_y', 'position_y', 'coord_y', 'coordinate_y']:
+                for alt_attr in alt_attrs:
                     if alt_attr in node_attrs:
-                        node_attrs['y'] = str(node_attrs[alt_attr])
+                        node_attrs[attr_name] = str(node_attrs[alt_attr])
                         break
                 else:
-                    # 代替属性が見つからない場合はランダムな位置を生成
-                    import random
-                    node_attrs['y'] = str(random.uniform(-1.0, 1.0))
-            else:
-                # 既存の属性を文字列に変換
-                node_attrs['y'] = str(node_attrs['y'])
+                    # 代替属性が見つからない場合はデフォルト値を使用
+                    node_attrs[attr_name] = default(node)
         
         # <key>要素を追加するためのリスト
         key_elements = []
@@ -452,25 +576,24 @@ def convert_to_standard_graphml(graphml_content):
         G.graph['graph_format_version'] = "1.0"
         G.graph['graph_format_type'] = "standardized_graphml"
         
-        # エッジにも標準的な属性を追加
+        # エッジにも標準的な属性を追加し、同じ走査ですべての属性を文字列に変換する
         logger.debug("Adding standard attributes to edges")
-        for u, v, data in G.edges(data=True):
-            if 'width' not in data:
-                data['width'] = "1.0"
-            else:
-                # 既存の属性を文字列に変換
-                data['width'] = str(data['width'])
-                
-            if 'color' not in data:
-                data['color'] = "#94a3b8"
-            else:
-                # 既存の属性を文字列に変換
-                data['color'] = str(data['color'])
+        for u, v, attrs in G.edges(data=True):
+            attrs.setdefault('width', "1.0")
+            attrs.setdefault('color', "#94a3b8")
+            for key, value in list(attrs.items()):
+                if value is not None:
+                    try:
+                        attrs[key] = str(value)
+                    except Exception as e:
+                        logger.warning(f"属性変換エラー (エッジ {u}-{v}, 属性 {key}): {e}")
+                        # 変換できない場合は安全な値に置き換え
+                        attrs[key] = f"Value-{key}"
         
         # 標準化されたGraphMLにエクスポート
         try:
             logger.debug("Exporting to standardized GraphML format")
-            # エクスポート前にノードとエッジの属性が文字列型であることを確認
+            # エクスポート前にノードの属性が文字列型であることを確認（エッジは追加時に変換済み）
             for node, attrs in G.nodes(data=True):
                 for key, value in list(attrs.items()):
                     if value is not None:
@@ -480,22 +603,9 @@ def convert_to_standard_graphml(graphml_content):
                             logger.warning(f"属性変換エラー (ノード {node}, 属性 {key}): {e}")
                             # 変換できない場合は安全な値に置き換え
                             attrs[key] = f"Value-{key}"
-                        
-            for u, v, attrs in G.edges(data=True):
-                for key, value in list(attrs.items()):
-                    if value is not None:
-                        try:
-                            attrs[key] = str(value)
-                        except Exception as e:
-                            logger.warning(f"属性変換エラー (エッジ {u}-{v}, 属性 {key}): {e}")
-                            # 変換できない場合は安全な値に置き換え
-                            attrs[key] = f"Value-{key}"
             
             try:
-                output = io.BytesIO()
-                nx.write_graphml(G, output)
-                output.seek(0)
-                standardized_graphml = output.read().decode("utf-8")
+                standardized_graphml = graph_to_graphml_string(G)
                 logger.debug("Successfully exported standardized GraphML")
             except Exception as write_error:
                 logger.error(f"GraphML書き込みエラー: {write_error}")
@@ -599,6 +709,9 @@ def convert_to_standard_graphml(graphml_content):
             "error": f"Error converting GraphML: {str(e)}"
         }
 
+# エクスポート時に各ノードへ既定値を補う属性
+_EXPORT_NODE_DEFAULT_KEYS = frozenset(["name", "size", "color", "description"])
+
 def export_network_as_graphml(G, positions=None, visual_properties=None):
     """
     ネットワークをGraphML形式でエクスポートする
@@ -612,49 +725,51 @@ def export_network_as_graphml(G, positions=None, visual_properties=None):
         dict: 処理結果を含む辞書
     """
     try:
+        # 追加・変更する属性がなければ、コピーせず元のグラフをそのまま出力する
+        if not positions and not visual_properties and all(
+            attrs.keys() >= _EXPORT_NODE_DEFAULT_KEYS for _, attrs in G.nodes(data=True)
+        ):
+            return {
+                "success": True,
+                "format": "graphml",
+                "content": graph_to_graphml_string(G)
+            }
+        
         # Create a copy of the graph to avoid modifying the original
         export_G = G.copy()
         
         # Add standard node attributes (name, color, size, description) if not present
-        for node in export_G.nodes():
+        for node, attrs in export_G.nodes(data=True):
             node_str = str(node)
-            
-            # Set default attributes if not present
-            if 'name' not in export_G.nodes[node]:
-                export_G.nodes[node]['name'] = node_str
-                
-            if 'size' not in export_G.nodes[node]:
-                export_G.nodes[node]['size'] = "5.0"  # Default size
-                
-            if 'color' not in export_G.nodes[node]:
-                export_G.nodes[node]['color'] = "#1d4ed8"  # Default color
-                
-            if 'description' not in export_G.nodes[node]:
-                export_G.nodes[node]['description'] = f"Node {node_str}"
+            attrs.setdefault('name', node_str)
+            attrs.setdefault('size', "5.0")  # Default size
+            attrs.setdefault('color', "#1d4ed8")  # Default color
+            attrs.setdefault('description', f"Node {node_str}")
         
         # Add positions if provided
         if positions:
-            pos_dict = {}
+            # 文字列のノードIDからグラフのノードへの対応表を一度だけ作る
+            # （GraphML由来のノードは文字列、生成したグラフのノードは整数）
+            node_by_id = {str(node): node for node in export_G}
+            # ノードごとの属性辞書をまとめて作り、set_node_attributesで一度に反映する
+            node_updates = {}
             for node_pos in positions:
-                node_id = node_pos["id"]
-                if node_id.isdigit():
-                    try:
-                        node_id = int(node_id)
-                    except:
-                        pass
-                
-                if node_id in export_G.nodes():
-                    # Add position attributes
-                    export_G.nodes[node_id]['x'] = str(node_pos.get('x', 0.0))
-                    export_G.nodes[node_id]['y'] = str(node_pos.get('y', 0.0))
-                    
-                    # Add other visual attributes if present
-                    if 'size' in node_pos:
-                        export_G.nodes[node_id]['size'] = str(node_pos['size'])
-                    if 'color' in node_pos:
-                        export_G.nodes[node_id]['color'] = node_pos['color']
-                    if 'label' in node_pos:
-                        export_G.nodes[node_id]['name'] = node_pos['label']
+                node_id = node_by_id.get(str(node_pos["id"]))
+                if node_id is None:
+                    continue
+                update = {
+                    'x': str(node_pos.get('x', 0.0)),
+                    'y': str(node_pos.get('y', 0.0))
+                }
+                # Add other visual attributes if present
+                if 'size' in node_pos:
+                    update['size'] = str(node_pos['size'])
+                if 'color' in node_pos:
+                    update['color'] = node_pos['color']
+                if 'label' in node_pos:
+                    update['name'] = node_pos['label']
+                node_updates[node_id] = update
+            nx.set_node_attributes(export_G, node_updates)
         
         # Add global visual properties if provided
         if visual_properties:
@@ -665,10 +780,7 @@ def export_network_as_graphml(G, positions=None, visual_properties=None):
             export_G.graph['edge_default_color'] = visual_properties.get('edge_color', '#94a3b8')
         
         # Export to GraphML
-        output = io.BytesIO()
-        nx.write_graphml(export_G, output)
-        output.seek(0)
-        graphml_content = output.read().decode("utf-8")
+        graphml_content = graph_to_graphml_string(export_G)
         
         return {
             "success": True,
@@ -682,32 +794,62 @@ def export_network_as_graphml(G, positions=None, visual_properties=None):
             "error": f"Error exporting network as GraphML: {str(e)}"
         }
 
-def get_network_info(G):
+def get_cached_network_info(cache_key):
     """
-    ネットワークの基本情報を取得する
-    
+    キャッシュ済みのネットワーク情報を取得する
+
+    Args:
+        cache_key (str): GraphMLのフィンガープリント
+
+    Returns:
+        dict or None: ネットワーク情報（キャッシュにない場合はNone）
+    """
+    info = _NETWORK_INFO_CACHE.get(cache_key)
+    return dict(info) if info is not None else None
+
+def refresh_network_info(G, cache_key):
+    """
+    ネットワーク情報を計算してキャッシュに格納する
+
+    グラフの読み込み・変換後にバックグラウンドで呼び出され、
+    以降のget_network_infoをキャッシュから返せるようにする。
+
     Args:
         G (nx.Graph): NetworkXグラフ
-        
+        cache_key (str): GraphMLのフィンガープリント
+
     Returns:
         dict: ネットワーク情報
     """
+    info = _compute_network_info(G)
+    if "error" not in info:
+        _NETWORK_INFO_CACHE.set(cache_key, info)
+    return dict(info)
+
+def _compute_network_info(G):
+    """ネットワークの基本指標を計算する"""
     try:
         # 基本的なネットワーク指標を計算
         num_nodes = G.number_of_nodes()
         num_edges = G.number_of_edges()
         density = nx.density(G)
         
-        # 連結成分の計算
-        is_connected = nx.is_connected(G)
-        num_components = nx.number_connected_components(G) if not is_connected else 1
-        
-        # 次数の計算
-        degrees = [d for _, d in G.degree()]
-        avg_degree = sum(degrees) / len(degrees) if degrees else 0
+        # 平均次数（次数の総和は有向・無向ともに2m なので、ノードを走査せずに求める）
+        avg_degree = 2.0 * num_edges / num_nodes if num_nodes else 0
         
-        # クラスタリング係数の計算
-        clustering = nx.average_clustering(G)
+        if _use_igraph(G) and not G.is_directed():
+            # 大規模グラフはigraph（C実装）で連結成分とクラスタリング係数を計算
+            g_ig, _ = _to_igraph(G)
+            num_components = len(g_ig.connected_components())
+            is_connected = num_components == 1
+            clustering = g_ig.transitivity_avglocal_undirected(mode="zero")
+        else:
+            # 連結成分の計算（一度の走査で成分数と連結性を求める）
+            num_components = nx.number_connected_components(G)
+            is_connected = num_components == 1
+            
+            # クラスタリング係数の計算
+            clustering = nx.average_clustering(G)
         
         return {
             "num_nodes": num_nodes,
@@ -724,6 +866,190 @@ def get_network_info(G):
             "error": f"Error getting network info: {str(e)}"
         }
 
+def get_network_info(G, cache_key=None):
+    """
+    ネットワークの基本情報を取得する
+    
+    Args:
+        G (nx.Graph): NetworkXグラフ
+        cache_key (str, optional): GraphMLのフィンガープリント。
+            指定した場合はキャッシュを参照し、未計算なら計算結果を格納する
+        
+    Returns:
+        dict: ネットワーク情報
+    """
+    if cache_key is None:
+        return _compute_network_info(G)
+    
+    info = get_cached_network_info(cache_key)
+    if info is not None:
+        return info
+    return refresh_network_info(G, cache_key)
+
+
+def _igraph_betweenness(G):
+    """igraphで媒介中心性を計算する"""
+    g_ig, nodelist = _to_igraph(G)
+    return dict(zip(nodelist, g_ig.betweenness(directed=G.is_directed())))
+
+def _igraph_closeness(G):
+    """igraphで近接中心性を計算する"""
+    g_ig, nodelist = _to_igraph(G)
+    return dict(zip(nodelist, g_ig.closeness()))
+
+def _igraph_pagerank(G):
+    """igraphでPageRankを計算する"""
+    g_ig, nodelist = _to_igraph(G)
+    return dict(zip(nodelist, g_ig.pagerank(damping=0.85, directed=G.is_directed())))
+
+def _partial_brandes(G, sources, weight=None):
+    """指定した始点集合からの最短経路のみを用いて媒介中心性への寄与を計算する"""
+    return nx.betweenness_centrality_subset(G, sources=sources, targets=list(G), normalized=False, weight=weight)
+
+def parallel_betweenness_centrality(G, processes=None, weight=None):
+    """
+    始点集合を分割し、joblibで並列に厳密な媒介中心性を計算する
+    
+    各ワーカーは担当する始点からのBrandes法の部分和を計算し、最後に合算して
+    nx.betweenness_centrality（normalized=True）と同じ値に正規化する。
+    joblibのlokyバックエンドはワーカープロセスを使い回し、マルチスレッドの
+    サーバープロセスをforkしないため、リクエストごとにプールを作らない。
+    
+    Args:
+        G (nx.Graph): NetworkXグラフ
+        processes (int, optional): ワーカープロセス数（デフォルト: CPUコア数）
+        weight (str, optional): エッジの重みの属性名
+        
+    Returns:
+        dict: ノードIDをキー、中心性値を値とする辞書
+    """
+    n = G.number_of_nodes()
+    nodes = list(G)
+    processes = min(processes or os.cpu_count() or 1, n)
+    if Parallel is None or processes <= 1:
+        return nx.betweenness_centrality(G, weight=weight)
+    
+    # チャンク数をワーカー数と同じにし、グラフの転送をワーカーごとに1回にする
+    chunks = [nodes[i::processes] for i in range(processes)]
+    partials = Parallel(n_jobs=processes)(delayed(_partial_brandes)(G, chunk, weight) for chunk in chunks)
+    
+    betweenness = dict.fromkeys(G, 0.0)
+    for partial in partials:
+        for node, value in partial.items():
+            betweenness[node] += value
+    # betweenness_centrality_subsetは無向グラフでは既に1/2倍しているため、正規化係数を2倍する
+    if n <= 2:
+        return betweenness
+    scale = 1.0 / ((n - 1) * (n - 2))
+    if not G.is_directed():
+        scale *= 2.0
+    return {node: value * scale for node, value in betweenness.items()}
+
+def approximate_betweenness_centrality(G, k=None, seed=None, weight=None, n_jobs=-1):
+    """
+    始点をk個サンプリングして媒介中心性を近似計算する
+    
+    始点集合をCPUコア数のチャンクに分割し、joblibで並列にBrandes法を実行して
+    部分和をマージする。計算量はO(k·m / コア数)。
+    
+    Args:
+        G (nx.Graph): NetworkXグラフ
+        k (int, optional): サンプリングする始点数（デフォルト: sqrt(N)）
+        seed (int, optional): 乱数シード
+        weight (str, optional): エッジの重みの属性名
+        n_jobs (int, optional): 並列ジョブ数（-1で全コア）
+        
+    Returns:
+        dict: ノードIDをキー、中心性値を値とする辞書
+    """
+    n = G.number_of_nodes()
+    if n == 0:
+        return {}
+    if k is None:
+        k = max(1, int(math.sqrt(n)))
+    k = min(int(k), n)
+    
+    sources = random.Random(seed).sample(list(G), k)
+    n_chunks = min(k, os.cpu_count() or 1)
+    chunks = [sources[i::n_chunks] for i in range(n_chunks)]
+    
+    if Parallel is not None and n_chunks > 1:
+        partials = Parallel(n_jobs=n_jobs)(delayed(_partial_brandes)(G, chunk, weight) for chunk in chunks)
+    else:
+        partials = [_partial_brandes(G, chunk, weight) for chunk in chunks]
+    
+    # 部分和をマージし、サンプリング率で外挿する
+    scale = n / k
+    betweenness = dict.fromkeys(G, 0.0)
+    for partial in partials:
+        for node, value in partial.items():
+            betweenness[node] += value
+    return {node: value * scale for node, value in betweenness.items()}
+
+def approximate_closeness_centrality(G, k=None, seed=None):
+    """
+    始点をk個サンプリングして近接中心性を近似計算する（Eppstein-Wang法）
+    
+    サンプリングした始点からの最短距離（CSR隣接行列上のBFS）のみを用いて、
+    各ノードへの平均距離を推定する。計算量はO(k·m)。
+    非連結グラフではnx.closeness_centrality（wf_improved=True）と同様に、
+    到達可能なノードの割合を掛けて補正する。
+    
+    Args:
+        G (nx.Graph): NetworkXグラフ
+        k (int, optional): サンプリングする始点数（デフォルト: sqrt(N)）
+        seed (int, optional): 乱数シード
+        
+    Returns:
+        dict: ノードIDをキー、中心性値を値とする辞書
+    """
+    from scipy.sparse.csgraph import shortest_path
+    
+    n = G.number_of_nodes()
+    if n <= 1:
+        return dict.fromkeys(G, 0.0)
+    if k is None:
+        k = max(1, int(math.sqrt(n)))
+    k = min(int(k), n)
+    
+    A, nodelist = graph_to_csr(G)
+    sources = np.array(sorted(random.Random(seed).sample(range(n), k)))
+    # dist[i, v]: i番目の始点からノードvへの距離（有向グラフでは入ってくる距離）
+    dist = shortest_path(A, directed=G.is_directed(), unweighted=True, indices=sources)
+    reachable = np.isfinite(dist)
+    reachable[np.arange(k), sources] = False
+    reached = reachable.sum(axis=0)
+    total = np.where(reachable, dist, 0.0).sum(axis=0)
+    
+    # 自分自身が始点に含まれる場合は、その始点を標本から除く
+    samples = np.full(n, k, dtype=np.float64)
+    samples[sources] -= 1
+    closeness = np.zeros(n)
+    valid = (reached > 0) & (total > 0)
+    closeness[valid] = (reached[valid] / total[valid]) * (reached[valid] / samples[valid])
+    return dict(zip(nodelist, closeness.tolist()))
+
+# サンプリング近似が可能な中心性と、既定で近似に切り替えるノード数の閾値
+_APPROXIMATE_CENTRALITY = {
+    "betweenness": (approximate_betweenness_centrality, BETWEENNESS_APPROX_THRESHOLD),
+    "closeness": (approximate_closeness_centrality, CLOSENESS_APPROX_THRESHOLD)
+}
+
+# igraphで計算可能な中心性（結果はcalculate_centralityで最大値正規化される）
+_IGRAPH_CENTRALITY = {
+    "betweenness": _igraph_betweenness,
+    "closeness": _igraph_closeness,
+    "pagerank": _igraph_pagerank
+}
+
+# 中心性の種類とNetworkXの計算関数の対応表（呼び出しごとに再構築しない）
+_CENTRALITY_FUNCTIONS = {
+    "degree": nx.degree_centrality,
+    "closeness": nx.closeness_centrality,
+    "betweenness": nx.betweenness_centrality,
+    "eigenvector": nx.eigenvector_centrality_numpy,
+    "pagerank": nx.pagerank
+}
 
 def calculate_centrality(G, centrality_type="degree", **kwargs):
     """
@@ -734,36 +1060,57 @@ def calculate_centrality(G, centrality_type="degree", **kwargs):
         centrality_type (str): 計算する中心性の種類
             (degree, closeness, betweenness, eigenvector, pagerank)
         **kwargs: 各中心性計算関数に渡す追加の引数
+            betweenness・closenessの場合、approximate (bool) と k (int) で
+            サンプリング近似を指定できる（kのみ指定した場合は近似、どちらも
+            未指定時はノード数が閾値を超えると近似）。その他の中心性では無視する
 
     Returns:
         dict: {node_id: centrality_value} の形式の辞書
     """
     try:
-        centrality_calculators = {
-            "degree": nx.degree_centrality,
-            "closeness": nx.closeness_centrality,
-            "betweenness": nx.betweenness_centrality,
-            "eigenvector": nx.eigenvector_centrality_numpy,
-            "pagerank": nx.pagerank
-        }
-
-        if centrality_type not in centrality_calculators:
+        calculator = _CENTRALITY_FUNCTIONS.get(centrality_type)
+        if calculator is None:
             raise ValueError(f"Unsupported centrality type: {centrality_type}")
 
         # 固有ベクトル中心性の場合、max_iterのデフォルト値を設定
         if centrality_type == "eigenvector":
             kwargs.setdefault("max_iter", 1000)
 
+        approximate = kwargs.pop("approximate", None)
+        if centrality_type not in _APPROXIMATE_CENTRALITY:
+            # 近似計算のない中心性では、近似用の引数は無視する
+            approximate = None
+            kwargs.pop("k", None)
+        elif approximate is None and "k" in kwargs:
+            # サンプル数kが明示された場合は、ノード数に関わらず近似計算とする
+            approximate = True
+        if approximate is False:
+            # 厳密計算では近似用の引数は使わない
+            kwargs.pop("k", None)
+        
         # 中心性を計算
-        centrality = centrality_calculators[centrality_type](G, **kwargs)
+        if approximate:
+            centrality = _APPROXIMATE_CENTRALITY[centrality_type][0](G, **kwargs)
+        elif not kwargs and centrality_type in _IGRAPH_CENTRALITY and _use_igraph(G):
+            centrality = _IGRAPH_CENTRALITY[centrality_type](G)
+        elif approximate is None and centrality_type in _APPROXIMATE_CENTRALITY and G.number_of_nodes() > _APPROXIMATE_CENTRALITY[centrality_type][1]:
+            centrality = _APPROXIMATE_CENTRALITY[centrality_type][0](G, **kwargs)
+        elif centrality_type == "betweenness" and kwargs.keys() <= {"weight"} and G.number_of_nodes() > BETWEENNESS_PARALLEL_THRESHOLD:
+            centrality = parallel_betweenness_centrality(G, **kwargs)
+        elif centrality_type in _CSR_CENTRALITY and kwargs.keys() <= _CSR_CENTRALITY[centrality_type][1]:
+            centrality = _CSR_CENTRALITY[centrality_type][0](G, **kwargs)
+        else:
+            centrality = calculator(G, **kwargs)
         
-        # 結果を標準化
-        max_value = max(centrality.values()) if centrality else 1.0
+        # 結果を標準化（NumPyで一括して最大値で割る）
+        values = np.fromiter(centrality.values(), dtype=np.float64, count=len(centrality))
+        max_value = values.max() if values.size else 1.0
         if max_value > 0:
-            # 0で除算しないようにチェック
-            centrality = {str(k): v / max_value for k, v in centrality.items()}
+            values /= max_value
         else:
-            centrality = {str(k): 0 for k, v in centrality.items()}
+            # 0で除算しないようにすべて0とする
+            values[:] = 0.0
+        centrality = dict(zip(map(str, centrality), values.tolist()))
 
         return {
             "success": True,
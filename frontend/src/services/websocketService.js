@@ -84,16 +84,29 @@ class WebSocketService {
       const data = JSON.parse(event.data);
       console.log('WebSocket message received:', data);
 
-      // イベントタイプに基づいて処理
-      if (data.event === 'graph_updated') {
-        console.log('Graph update notification received:', data);
-        this.handleGraphUpdated(data);
+      // サーバーは連続したメッセージを1フレームにまとめて送ることがある
+      if (data.type === 'batch') {
+        data.msgs.forEach((message) => this.dispatchMessage(message));
+      } else {
+        this.dispatchMessage(data);
       }
     } catch (error) {
       console.error('Error processing WebSocket message:', error);
     }
   }
 
+  /**
+   * Dispatch a single server message by its event type
+   * @param {Object} data - Decoded message
+   */
+  dispatchMessage(data) {
+    // イベントタイプに基づいて処理
+    if (data.event === 'graph_updated') {
+      console.log('Graph update notification received:', data);
+      this.handleGraphUpdated(data);
+    }
+  }
+
   /**
    * Handle WebSocket close event
    */